@@ -2,56 +2,179 @@
 """
 Analyze the structure of your processed CSV files
 """
-import pandas as pd
+import itertools
 import json
 import os
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
-def analyze_csv_file(filepath):
-    """Analyze a single CSV file"""
-    print(f"\n{'='*60}")
-    print(f"Analyzing: {filepath}")
-    print('='*60)
-    
-    if not os.path.exists(filepath):
-        print(f"File not found: {filepath}")
-        return None
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pacsv
+from pyarrow import parquet as pq
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+STRING_DICT_MAX_CARDINALITY = 1024
+
+def _is_string_type(dtype):
+    """True for plain or dictionary-encoded string columns"""
+    if pa.types.is_dictionary(dtype):
+        dtype = dtype.value_type
+    return pa.types.is_string(dtype) or pa.types.is_large_string(dtype)
+
+def profile_csv_file(filepath):
+    """Collect per-column statistics for a CSV file in one streaming pass"""
+    # Stat the CSV once; a missing file raises FileNotFoundError right here
+    csv_mtime = os.stat(filepath).st_mtime
     
+    # Reuse the typed, columnar Parquet copy when it is at least as new as the CSV
+    pq_path = os.path.splitext(filepath)[0] + '.parquet'
     try:
-        df = pd.read_csv(filepath)
-        
-        print(f"Shape: {df.shape}")
-        print(f"\nColumns ({len(df.columns)}):")
-        for i, col in enumerate(df.columns):
-            dtype = df[col].dtype
-            unique_count = df[col].nunique()
-            sample_values = df[col].unique()[:3] if unique_count <= 10 else []
-            print(f"  {i:2}. {col:20} ({dtype}): {unique_count} unique", end="")
-            if sample_values:
-                print(f" - Sample: {sample_values}")
-            else:
-                print()
-        
-        print(f"\nData types:")
-        print(df.dtypes.value_counts())
-        
-        print(f"\nMissing values:")
-        missing = df.isnull().sum()
-        missing = missing[missing > 0]
-        if len(missing) > 0:
-            print(missing)
-        else:
-            print("No missing values")
-        
-        # Check for target column
-        if 'target' in df.columns:
-            print(f"\nTarget distribution:")
-            print(df['target'].value_counts(normalize=True).apply(lambda x: f"{x*100:.1f}%"))
-        
-        return df
-        
+        cache_is_fresh = os.stat(pq_path).st_mtime >= csv_mtime
+    except FileNotFoundError:
+        cache_is_fresh = False
+    cache_writer = None
+    if cache_is_fresh:
+        parquet_file = pq.ParquetFile(pq_path)
+        schema = parquet_file.schema_arrow
+        batches = parquet_file.iter_batches()
+    else:
+        # Stream record batches; only per-column counters are kept in memory
+        reader = pacsv.open_csv(
+            filepath,
+            read_options=pacsv.ReadOptions(use_threads=True, block_size=8 << 20),
+            # Low-cardinality text (e.g. user_type labels) arrives as compact
+            # dictionary arrays instead of one Python-visible string per row
+            convert_options=pacsv.ConvertOptions(
+                auto_dict_encode=True,
+                auto_dict_max_cardinality=STRING_DICT_MAX_CARDINALITY
+            )
+        )
+        schema = reader.schema
+        batches = reader
+        cache_writer = pq.ParquetWriter(pq_path + '.tmp', schema, compression='zstd')
+    
+    target_idx = schema.get_field_index('target')
+    
+    row_count = 0
+    null_counts = [0] * len(schema.names)
+    distinct_values = [{} for _ in schema.names]  # dicts keep first-seen order
+    target_counts = Counter()
+    
+    try:
+        for batch in batches:
+            if cache_writer is not None:
+                cache_writer.write_batch(batch)
+            row_count += batch.num_rows
+            for i, column in enumerate(batch.columns):
+                null_count = column.null_count  # read from the validity bitmap, no scan
+                null_counts[i] += null_count
+                # Hash-dedupe in Arrow first; only the batch's distinct values reach Python.
+                # Nulls are dropped from the (small) unique result, and only when present.
+                uniques = column.unique()
+                if null_count:
+                    uniques = uniques.drop_null()
+                distinct_values[i].update(dict.fromkeys(uniques.to_pylist()))
+            if target_idx >= 0:
+                # Count in Arrow; only one (value, count) pair per class reaches Python
+                for entry in pc.value_counts(batch.column(target_idx)).to_pylist():
+                    if entry['values'] is not None:
+                        target_counts[entry['values']] += entry['counts']
+    except Exception:
+        if cache_writer is not None:
+            cache_writer.close()
+            os.remove(pq_path + '.tmp')
+        raise
+    
+    if cache_writer is not None:
+        cache_writer.close()
+        os.replace(pq_path + '.tmp', pq_path)
+    
+    return {
+        'rows': row_count,
+        'schema': schema,
+        'null_counts': null_counts,
+        'distinct_values': distinct_values,
+        'target_counts': target_counts if target_idx >= 0 else None,
+        'string_columns': [field.name for field in schema if _is_string_type(field.type)]
+    }
+
+def _try_profile_csv_file(filepath):
+    """Profile a file, returning (profile, error) instead of raising"""
+    try:
+        return profile_csv_file(filepath), None
     except Exception as e:
-        print(f"Error reading file: {e}")
+        return None, e
+
+def analyze_csv_file(filepath, result=None):
+    """Analyze a single CSV file and print its report
+    
+    Args:
+        filepath: CSV file to analyze
+        result: Optional (profile, error) pair from an earlier
+            _try_profile_csv_file call, so parsing can happen elsewhere
+    """
+    # Report lines are collected and written once, not one print() per line
+    out = [
+        f"\n{'='*60}",
+        f"Analyzing: {filepath}",
+        '='*60
+    ]
+    
+    profile, error = result if result is not None else _try_profile_csv_file(filepath)
+    
+    if isinstance(error, FileNotFoundError):
+        out.append(f"File not found: {filepath}")
+        sys.stdout.write('\n'.join(out) + '\n')
+        return None
+    if error is not None:
+        out.append(f"Error reading file: {error}")
+        sys.stdout.write('\n'.join(out) + '\n')
         return None
+    
+    schema = profile['schema']
+    columns = schema.names
+    row_count = profile['rows']
+    distinct_values = profile['distinct_values']
+    
+    out.append(f"Shape: ({row_count}, {len(columns)})")
+    out.append(f"\nColumns ({len(columns)}):")
+    dtypes = schema.types
+    for i, col in enumerate(columns):
+        dtype = dtypes[i]
+        unique_count = len(distinct_values[i])
+        sample_values = list(distinct_values[i])[:3] if unique_count <= 10 else []
+        line = f"  {i:2}. {col:20} ({dtype}): {unique_count} unique"
+        if sample_values:
+            line += f" - Sample: {sample_values}"
+        out.append(line)
+    
+    out.append(f"\nData types:")
+    for dtype, count in Counter(str(dtype) for dtype in dtypes).most_common():
+        out.append(f"  {dtype}: {count}")
+    
+    out.append(f"\nMissing values:")
+    missing = {col: count for col, count in zip(columns, profile['null_counts']) if count > 0}
+    if len(missing) > 0:
+        for col, count in missing.items():
+            out.append(f"  {col}: {count}")
+    else:
+        out.append("No missing values")
+    
+    # Check for target column
+    if profile['target_counts'] is not None:
+        out.append(f"\nTarget distribution:")
+        labelled = sum(profile['target_counts'].values())
+        for value, count in profile['target_counts'].most_common():
+            out.append(f"  {value}: {count / labelled * 100:.1f}%")
+    
+    sys.stdout.write('\n'.join(out) + '\n')
+    return profile
 
 def main():
     """Main analysis function"""
@@ -63,54 +186,69 @@ def main():
         'data/processed/typical.csv'
     ]
     
-    all_dfs = []
+    # Parse the files concurrently (Arrow releases the GIL), then report in order
+    with ThreadPoolExecutor(max_workers=len(files)) as executor:
+        results = list(executor.map(_try_profile_csv_file, files))
+    
+    analyzed = []
     
-    for filepath in files:
-        df = analyze_csv_file(filepath)
-        if df is not None:
-            all_dfs.append(df)
+    for filepath, result in zip(files, results):
+        profile = analyze_csv_file(filepath, result)
+        if profile is not None:
+            analyzed.append((filepath, profile))
     
-    if len(all_dfs) > 1:
+    if len(analyzed) > 1:
         print(f"\n{'='*60}")
         print("Comparing files...")
         print('='*60)
         
         # Compare columns
-        columns_sets = [set(df.columns) for df in all_dfs]
-        common_columns = set.intersection(*columns_sets)
+        columns_sets = [set(profile['schema'].names) for _, profile in analyzed]
+        # Smallest set drives the intersection; stop as soon as nothing is shared
+        smallest, *others = sorted(columns_sets, key=len)
+        common_columns = smallest.copy()
+        for column_set in others:
+            common_columns.intersection_update(column_set)
+            if not common_columns:
+                break
         
         print(f"Common columns ({len(common_columns)}):")
         for col in sorted(common_columns):
             print(f"  {col}")
         
-        # Check differences
-        for i, filepath in enumerate(files):
-            df_cols = set(all_dfs[i].columns) if i < len(all_dfs) else set()
-            extra_cols = df_cols - common_columns
-            if extra_cols:
-                print(f"\nExtra columns in {os.path.basename(filepath)}:")
-                for col in extra_cols:
-                    print(f"  {col}")
-        
-        # Save analysis
         analysis = {
             'files_analyzed': files,
             'common_columns': list(common_columns),
             'file_stats': {}
         }
         
-        for i, filepath in enumerate(files):
-            if i < len(all_dfs):
-                df = all_dfs[i]
-                analysis['file_stats'][os.path.basename(filepath)] = {
-                    'rows': len(df),
-                    'columns': len(df.columns),
-                    'columns_list': list(df.columns),
-                    'dtypes': {col: str(df[col].dtype) for col in df.columns}
-                }
+        # Single pass per file: column differences and file stats
+        for (filepath, profile), file_cols in zip(analyzed, columns_sets):
+            schema = profile['schema']
+            extra_cols = file_cols - common_columns
+            if extra_cols:
+                print(f"\nExtra columns in {os.path.basename(filepath)}:")
+                for col in extra_cols:
+                    print(f"  {col}")
+            
+            analysis['file_stats'][os.path.basename(filepath)] = {
+                'rows': profile['rows'],
+                'columns': len(schema.names),
+                'columns_list': schema.names,
+                'dtypes': {field.name: str(field.type) for field in schema}
+            }
+        
+        string_cols = sorted(set(itertools.chain.from_iterable(
+            profile['string_columns'] for _, profile in analyzed
+        )))
         
-        with open('data/analysis_report.json', 'w') as f:
-            json.dump(analysis, f, indent=2)
+        # Save analysis
+        if orjson is not None:
+            with open('data/analysis_report.json', 'wb') as f:
+                f.write(orjson.dumps(analysis, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        else:
+            with open('data/analysis_report.json', 'w') as f:
+                json.dump(analysis, f, indent=2)
         
         print(f"\n✓ Analysis saved to data/analysis_report.json")
         
@@ -120,12 +258,6 @@ def main():
         print('='*60)
         
         # Check if we need to clean the data
-        string_cols = []
-        for df in all_dfs:
-            string_cols.extend(df.select_dtypes(include=['object']).columns.tolist())
-        
-        string_cols = list(set(string_cols))
-        
         if string_cols:
             print(f"\n1. String columns found: {string_cols}")
             print("   These need to be handled before training:")
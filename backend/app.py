@@ -1,23 +1,42 @@
 """
 Federated HeartCare API with Live Tracking and Improved Prediction
 """
+# eventlet must patch the standard library before anything else imports it,
+# so the Socket.IO server gets real WebSocket transport and green I/O
+try:
+    import eventlet
+    eventlet.monkey_patch()
+    ASYNC_MODE = 'eventlet'
+except ImportError:
+    ASYNC_MODE = 'threading'
+
 import os
 import logging
-import math
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from datetime import datetime
-import random
+import numpy as np
 import threading
-import time
+
+from utils.fast_json import OrjsonCodec, OrjsonProvider, dumps_bytes
+from utils.helpers import request_timestamp
 
 # Create app
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
 
-# Initialize SocketIO for real-time communication
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+# Initialize SocketIO for real-time communication. With a message queue
+# (e.g. redis://localhost:6379/0) emits fan out to clients on every worker
+# process, so the API can run with more than one gunicorn worker.
+socketio = SocketIO(
+    app,
+    cors_allowed_origins="*",
+    async_mode=ASYNC_MODE,
+    json=OrjsonCodec,
+    message_queue=os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+)
 
 # Configuration
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'federated-heartcare-secret-key')
@@ -26,6 +45,10 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'federated-heartcare-sec
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Per-tick live tracking logs, on their own child logger so they can be
+# quietened without touching the rest of the application's INFO output
+tracking_logger = logger.getChild('tracking')
+
 # Global variables for live tracking
 tracking_active = False
 tracking_thread = None
@@ -50,126 +73,254 @@ try:
 except ImportError as e:
     logger.warning(f"Prediction routes not found: {e}")
 
-# Generate realistic vital signs for a specific person
-def generate_vital_signs(person_id="person_001"):
-    """Generate realistic vital signs for tracking"""
-    base_values = {
-        "person_001": {  # John Doe
-            "heart_rate_range": (65, 85),
-            "bp_systolic_range": (120, 135),
-            "bp_diastolic_range": (75, 85),
-            "o2_range": (96, 99),
-            "resp_range": (14, 18),
-            "temp_range": (36.5, 37.0)
-        },
-        "person_002": {  # Jane Smith
-            "heart_rate_range": (70, 90),
-            "bp_systolic_range": (125, 140),
-            "bp_diastolic_range": (80, 90),
-            "o2_range": (95, 98),
-            "resp_range": (16, 20),
-            "temp_range": (36.6, 37.1)
-        },
-        "person_003": {  # Robert Johnson
-            "heart_rate_range": (75, 95),
-            "bp_systolic_range": (130, 145),
-            "bp_diastolic_range": (85, 95),
-            "o2_range": (94, 97),
-            "resp_range": (18, 22),
-            "temp_range": (36.7, 37.2)
-        }
+# Generators for the simulated telemetry; NumPy Generators are not thread-safe,
+# so each thread (or green thread) draws from its own OS-seeded instance
+_rng_local = threading.local()
+
+def _get_rng():
+    """Return this thread's random generator, creating it on first use"""
+    rng = getattr(_rng_local, 'rng', None)
+    if rng is None:
+        rng = _rng_local.rng = np.random.default_rng()
+    return rng
+
+# Vital-sign ranges for each trackable person
+PERSON_VITAL_RANGES = {
+    "person_001": {  # John Doe
+        "heart_rate_range": (65, 85),
+        "bp_systolic_range": (120, 135),
+        "bp_diastolic_range": (75, 85),
+        "o2_range": (96, 99),
+        "resp_range": (14, 18),
+        "temp_range": (36.5, 37.0)
+    },
+    "person_002": {  # Jane Smith
+        "heart_rate_range": (70, 90),
+        "bp_systolic_range": (125, 140),
+        "bp_diastolic_range": (80, 90),
+        "o2_range": (95, 98),
+        "resp_range": (16, 20),
+        "temp_range": (36.6, 37.1)
+    },
+    "person_003": {  # Robert Johnson
+        "heart_rate_range": (75, 95),
+        "bp_systolic_range": (130, 145),
+        "bp_diastolic_range": (85, 95),
+        "o2_range": (94, 97),
+        "resp_range": (18, 22),
+        "temp_range": (36.7, 37.2)
     }
+}
+
+# Integer vitals, in the column order of the batched draw
+_INT_VITAL_RANGES = (
+    "heart_rate_range", "bp_systolic_range", "bp_diastolic_range", "o2_range", "resp_range"
+)
+
+# Per-person bounds as rows: integer lows, exclusive integer highs, temperature range
+_VITAL_BOUNDS = {
+    person_id: (
+        [config[key][0] for key in _INT_VITAL_RANGES],
+        [config[key][1] + 1 for key in _INT_VITAL_RANGES],
+        config["temp_range"]
+    )
+    for person_id, config in PERSON_VITAL_RANGES.items()
+}
+
+ECG_POINTS = 50
+
+ECG_SAMPLE_RATE = 25  # Hz, so each 2 s tick streams one frame of ECG_POINTS samples
+ECG_SYNTH_RATE = 500  # Hz, the waves are built at this rate and then decimated
+ECG_NOISE_STD = 0.02
+
+# Gaussian wave components: (amplitude, offset from the R peak in s, width in s)
+_ECG_COMPONENTS = (
+    (0.15, -0.20, 0.040),  # P wave
+    (-0.10, -0.03, 0.012),  # Q
+    (1.00, 0.00, 0.020),  # R
+    (-0.25, 0.03, 0.012),  # S
+    (0.30, 0.28, 0.060)  # T wave
+)
+
+def _build_synth_ecg(length=5000, fs=ECG_SAMPLE_RATE, mean_nn=0.8, nn_std=0.05):
+    """Build a cyclic synthetic ECG trace as a sum of Gaussian P/Q/R/S/T waves
     
-    person_config = base_values.get(person_id, base_values["person_001"])
+    Beats are placed on a series of NN intervals that is rescaled to tile the
+    trace exactly, and wave distances wrap around, so the trace can be read
+    as a ring buffer without a seam. The QRS waves are only a few ms wide, so
+    the trace is built at ECG_SYNTH_RATE and low-passed to fs / 2 before
+    decimating; the filter is applied in the frequency domain, which keeps
+    the ring seamless.
+    """
+    q = max(1, round(ECG_SYNTH_RATE / fs))
+    fs_hi = fs * q
+    n_hi = length * q
+    duration = length / fs
+    nn_intervals = _get_rng().normal(mean_nn, nn_std, max(1, round(duration / mean_nn)))
+    nn_intervals *= duration / nn_intervals.sum()
+    r_peaks = np.cumsum(nn_intervals) - nn_intervals[0]
     
-    # Generate ECG wave data (simulated)
-    ecg_points = 50
-    ecg_wave = []
-    for i in range(ecg_points):
-        # Simulate ECG waveform
-        t = i / 10.0
-        base = random.uniform(-0.1, 0.1)
-        
-        # Add P wave
-        if 2 <= t <= 3:
-            base += random.uniform(0.1, 0.3)
-        # Add QRS complex
-        elif 3.5 <= t <= 4.5:
-            base += random.uniform(0.8, 1.2)
-        # Add T wave
-        elif 5 <= t <= 6:
-            base += random.uniform(0.2, 0.4)
-        
-        ecg_wave.append(round(base, 2))
+    ecg = np.zeros(n_hi)
+    for amplitude, offset, width in _ECG_COMPONENTS:
+        # Evaluate each wave within 6 widths of its center, wrapping indices
+        half = int(np.ceil(6 * width * fs_hi))
+        centers = np.round((r_peaks + offset) * fs_hi).astype(np.int64)
+        index = centers[:, None] + np.arange(-half, half + 1)
+        distance = index / fs_hi - (r_peaks + offset)[:, None]
+        np.add.at(ecg, index % n_hi, amplitude * np.exp(-0.5 * (distance / width) ** 2))
     
-    return {
-        "person_id": person_id,
-        "timestamp": datetime.now().isoformat(),
-        "heart_rate": random.randint(*person_config["heart_rate_range"]),
-        "blood_pressure": f"{random.randint(*person_config['bp_systolic_range'])}/{random.randint(*person_config['bp_diastolic_range'])}",
-        "oxygen_saturation": random.randint(*person_config["o2_range"]),
-        "respiratory_rate": random.randint(*person_config["resp_range"]),
-        "temperature": round(random.uniform(*person_config["temp_range"]), 1),
-        "ecg_wave": ecg_wave,
-        "status": "tracking"
-    }
+    # Keep only the bins below the output Nyquist rate, then resample
+    spectrum = np.fft.rfft(ecg)[:length // 2 + 1]
+    return (np.fft.irfft(spectrum, n=length) / q).astype(np.float32)
+
+_SYNTH_ECG = _build_synth_ecg(length=100 * ECG_POINTS)
+
+# The trace as a lookup table of consecutive frames, indexed by frame number
+_ECG_FRAMES = _SYNTH_ECG.reshape(-1, ECG_POINTS)
+
+# Next frame number per person, advanced by one per reading
+_ecg_frame_index = {}
+
+def _next_ecg_frames(person_ids):
+    """Return each person's next ECG frame as a new (n, ECG_POINTS) array"""
+    indices = []
+    for person_id in person_ids:
+        index = _ecg_frame_index.get(person_id)
+        if index is None:
+            # Start each person at a different point of the trace
+            index = int(_get_rng().integers(len(_ECG_FRAMES)))
+        _ecg_frame_index[person_id] = (index + 1) % len(_ECG_FRAMES)
+        indices.append(index)
+    return _ECG_FRAMES[indices]
+
+def _batch_vitals(person_ids, timestamp=None):
+    """Generate vital signs for several people with one draw per vital type
+    
+    Args:
+        person_ids: People to generate readings for
+        timestamp: ISO timestamp shared by the readings; defaults to now
+    """
+    bounds = [_VITAL_BOUNDS.get(pid, _VITAL_BOUNDS["person_001"]) for pid in person_ids]
+    n = len(person_ids)
+    rng = _get_rng()
+    
+    int_vitals = rng.integers([b[0] for b in bounds], [b[1] for b in bounds]).tolist()
+    temperatures = np.round(
+        rng.uniform([b[2][0] for b in bounds], [b[2][1] for b in bounds]), 1
+    ).tolist()
+    
+    # Look up each person's next ECG frame in the prebuilt table and add fresh noise
+    ecg = _next_ecg_frames(person_ids)
+    ecg += rng.normal(0, ECG_NOISE_STD, (n, ECG_POINTS)).astype(np.float32)
+    # Each row goes out as a raw little-endian float32 frame (a Socket.IO binary
+    # attachment); clients read it with new Float32Array(data.ecg_wave)
+    ecg_waves = [row.tobytes() for row in ecg.astype('<f4', copy=False)]
+    
+    if timestamp is None:
+        timestamp = datetime.now().isoformat()
+    
+    vitals = []
+    for person_id, (heart_rate, systolic, diastolic, o2, resp), temperature, ecg_wave in zip(
+        person_ids, int_vitals, temperatures, ecg_waves
+    ):
+        vitals.append({
+            "person_id": person_id,
+            "timestamp": timestamp,
+            "heart_rate": heart_rate,
+            "blood_pressure": f"{systolic}/{diastolic}",
+            "oxygen_saturation": o2,
+            "respiratory_rate": resp,
+            "temperature": temperature,
+            "ecg_wave": ecg_wave,
+            "status": "tracking"
+        })
+    
+    return vitals
 
-# Live tracking thread
+# Generate realistic vital signs for a specific person
+def generate_vital_signs(person_id="person_001"):
+    """Generate realistic vital signs for tracking"""
+    return _batch_vitals([person_id])[0]
+
+# Live tracking background task
 def live_tracking_loop():
-    """Background thread for live data streaming"""
-    global tracking_active, current_tracking_person
+    """Background task for live data streaming"""
+    global tracking_active
     
-    while tracking_active and current_tracking_person:
+    log_tick = 0
+    while tracking_active:
         try:
-            # Generate live data for the tracked person
-            live_data = generate_vital_signs(current_tracking_person)
+            # Only people some client has subscribed to; one batched draw for all
+            person_ids = sorted({
+                client['tracking_person'] for client in list(connected_clients.values())
+                if client['tracking_person']
+            })
             
-            # Send to all connected WebSocket clients
-            socketio.emit('live_vitals', live_data)
+            # One timestamp per tick, shared by every person's reading
+            tick_timestamp = datetime.now().isoformat()
             
-            # Log every 10 seconds to avoid spam
-            if int(time.time()) % 10 == 0:
-                logger.info(f"Live tracking: {current_tracking_person} - HR: {live_data['heart_rate']} bpm")
+            # Log every 5th tick (10 seconds) to avoid spam
+            log_tick += 1
+            log_this_tick = log_tick % 5 == 0 and tracking_logger.isEnabledFor(logging.INFO)
             
-            time.sleep(2)  # Update every 2 seconds
+            # Each payload is serialized once and sent only to that person's room
+            for live_data in _batch_vitals(person_ids, tick_timestamp):
+                socketio.emit('live_vitals', live_data, to=live_data['person_id'])
+                
+                if log_this_tick:
+                    tracking_logger.info("Live tracking: %s - HR: %s bpm", live_data['person_id'], live_data['heart_rate'])
+            
+            socketio.sleep(2)  # Update every 2 seconds
             
         except Exception as e:
-            logger.error(f"Live tracking error: {e}")
+            logger.error("Live tracking error: %s", e)
             break
 
+def _subscribe(client_id, person_id):
+    """Move a client into the Socket.IO room of the person it tracks"""
+    client = connected_clients.get(client_id)
+    if client is None:
+        return
+    
+    previous = client['tracking_person']
+    if previous and previous != person_id:
+        leave_room(previous)
+    if person_id:
+        join_room(person_id)
+    client['tracking_person'] = person_id
+
 # WebSocket event handlers
 @socketio.on('connect')
 def handle_connect():
     client_id = request.sid
+    timestamp = datetime.now().isoformat()
     connected_clients[client_id] = {
-        'connected_at': datetime.now().isoformat(),
+        'connected_at': timestamp,
         'tracking_person': None
     }
     
-    logger.info(f"Client connected: {client_id}")
+    logger.info("Client connected: %s", client_id)
     emit('connected', {
         'status': 'connected',
         'message': 'Connected to Federated HeartCare Live Tracking',
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': timestamp,
         'tracking_available': True
     })
 
 @socketio.on('disconnect')
 def handle_disconnect():
     client_id = request.sid
-    if client_id in connected_clients:
-        del connected_clients[client_id]
-    logger.info(f"Client disconnected: {client_id}")
+    connected_clients.pop(client_id, None)
+    logger.info("Client disconnected: %s", client_id)
 
 @socketio.on('select_person')
 def handle_select_person(data):
     client_id = request.sid
     person_id = data.get('person_id')
     
-    if client_id in connected_clients:
-        connected_clients[client_id]['tracking_person'] = person_id
+    _subscribe(client_id, person_id)
     
-    logger.info(f"Client {client_id} selected person: {person_id}")
+    logger.info("Client %s selected person: %s", client_id, person_id)
     emit('person_selected', {
         'person_id': person_id,
         'message': f'Now tracking {person_id}',
@@ -182,13 +333,16 @@ def handle_start_tracking(data):
     
     person_id = data.get('person_id')
     
+    # The requesting client receives this person's vitals even if the loop is already running
+    if person_id:
+        _subscribe(request.sid, person_id)
+    
     if not tracking_active and person_id:
         current_tracking_person = person_id
         tracking_active = True
-        tracking_thread = threading.Thread(target=live_tracking_loop, daemon=True)
-        tracking_thread.start()
+        tracking_thread = socketio.start_background_task(live_tracking_loop)
         
-        logger.info(f"Live tracking started for: {person_id}")
+        logger.info("Live tracking started for: %s", person_id)
         emit('tracking_status', {
             'active': True,
             'person_id': person_id,
@@ -218,30 +372,40 @@ def handle_request_person_data(data):
         emit('person_vitals', person_data)
 
 # REST API Routes
+# Static parts of the index and model-list responses, built once at import
+_INDEX_ENDPOINTS = {
+    'health': '/api/v1/health',
+    'predict': '/api/v1/predict',
+    'predict_batch': '/api/v1/predict/batch',
+    'models': '/api/v1/models',
+    'live_tracking': 'ws://localhost:5001/socket.io'
+}
+
+if MONITOR_AVAILABLE:
+    _INDEX_ENDPOINTS.update({
+        'monitor_status': '/monitor/api/monitor/status',
+        'monitor_people': '/monitor/api/monitor/people',
+        'live_demo': '/monitor/api/monitor/live-demo'
+    })
+
+_MODELS_BODY = dumps_bytes({
+    'status': 'success',
+    'data': {
+        'models': ['federated', 'centralized', 'athletic', 'diver', 'typical'],
+        'count': 5,
+        'description': 'Federated models preserve privacy by training on decentralized data'
+    }
+})
+
 @app.route('/')
 def index():
-    endpoints = {
-        'health': '/api/v1/health',
-        'predict': '/api/v1/predict',
-        'models': '/api/v1/models',
-        'live_tracking': 'ws://localhost:5001/socket.io',
-        'connected_clients': len(connected_clients)
-    }
-    
-    if MONITOR_AVAILABLE:
-        endpoints.update({
-            'monitor_status': '/monitor/api/monitor/status',
-            'monitor_people': '/monitor/api/monitor/people',
-            'live_demo': '/monitor/api/monitor/live-demo'
-        })
-    
     return jsonify({
         'service': 'Federated HeartCare API',
         'version': '1.0.0',
         'status': 'running',
         'live_tracking': 'active' if tracking_active else 'inactive',
         'tracking_person': current_tracking_person,
-        'endpoints': endpoints
+        'endpoints': {**_INDEX_ENDPOINTS, 'connected_clients': len(connected_clients)}
     })
 
 @app.route('/api/v1/health')
@@ -250,7 +414,7 @@ def health():
         'status': 'success',
         'data': {
             'status': 'healthy',
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': request_timestamp(),
             'service': 'Federated HeartCare API',
             'version': '1.0.0',
             'live_tracking': {
@@ -272,20 +436,19 @@ def start_live_tracking():
     if not tracking_active and person_id:
         current_tracking_person = person_id
         tracking_active = True
-        tracking_thread = threading.Thread(target=live_tracking_loop, daemon=True)
-        tracking_thread.start()
+        tracking_thread = socketio.start_background_task(live_tracking_loop)
         
         return jsonify({
             'status': 'success',
             'message': f'Live tracking started for {person_id}',
             'person_id': person_id,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': request_timestamp()
         })
     
     return jsonify({
         'status': 'error' if tracking_active else 'invalid_request',
         'message': 'Live tracking is already active' if tracking_active else 'Person ID required',
-        'timestamp': datetime.now().isoformat()
+        'timestamp': request_timestamp()
     })
 
 @app.route('/api/live/stop', methods=['POST'])
@@ -298,7 +461,7 @@ def stop_live_tracking():
     return jsonify({
         'status': 'success',
         'message': 'Live tracking stopped',
-        'timestamp': datetime.now().isoformat()
+        'timestamp': request_timestamp()
     })
 
 @app.route('/api/live/status')
@@ -309,223 +472,14 @@ def live_tracking_status():
             'active': tracking_active,
             'person': current_tracking_person,
             'connected_clients': len(connected_clients),
-            'timestamp': datetime.now().isoformat()
+            'timestamp': request_timestamp()
         }
     })
 
-@app.route('/api/v1/predict', methods=['POST'])
-def predict():
-    try:
-        data = request.get_json()
-        
-        if not data or 'features' not in data:
-            return jsonify({
-                'status': 'error',
-                'message': 'Missing features in request'
-            }), 400
-        
-        features = data['features']
-        model_type = data.get('model_type', 'federated')
-        
-        # Validate features length
-        if len(features) != 13:
-            return jsonify({
-                'status': 'error',
-                'message': f'Expected 13 features, got {len(features)}'
-            }), 400
-        
-        # Unpack features with proper names
-        age, sex, cp, trestbps, chol, fbs, restecg, thalach, exang, oldpeak, slope, ca, thal = features
-        
-        # Validate physiological ranges
-        validation_errors = []
-        
-        # Age validation
-        if age < 20 or age > 100:
-            validation_errors.append(f"Age ({age}) outside plausible range (20-100)")
-        
-        # Resting BP validation (in mmHg)
-        if trestbps < 80 or trestbps > 200:
-            validation_errors.append(f"Resting BP ({trestbps} mmHg) outside plausible range (80-200)")
-        
-        # Cholesterol validation (in mg/dl)
-        if chol < 100 or chol > 600:
-            validation_errors.append(f"Cholesterol ({chol} mg/dl) outside plausible range (100-600)")
-        
-        # Max heart rate validation (should be ~220 - age)
-        expected_max_hr = 220 - age
-        if thalach < 60 or thalach > 220:
-            validation_errors.append(f"Max heart rate ({thalach} bpm) outside plausible range (60-220)")
-        elif thalach > expected_max_hr * 1.2:  # Allow 20% above theoretical max
-            validation_errors.append(f"Max heart rate ({thalach} bpm) exceeds plausible maximum (~{expected_max_hr})")
-        
-        # If validation errors, return them
-        if validation_errors:
-            return jsonify({
-                'status': 'validation_error',
-                'message': 'Input validation failed',
-                'errors': validation_errors,
-                'timestamp': datetime.now().isoformat()
-            }), 400
-        
-        # Calculate risk based on medical guidelines
-        risk_score = 0
-        
-        # Age factor
-        if age >= 55:
-            risk_score += 2
-        elif age >= 45:
-            risk_score += 1
-        
-        # Gender factor (1 = male, 0 = female)
-        if sex == 1:  # Male
-            risk_score += 1
-        
-        # Cholesterol factor (>240 is high)
-        if chol >= 240:
-            risk_score += 2
-        elif chol >= 200:
-            risk_score += 1
-        
-        # Blood pressure factor
-        if trestbps >= 140:
-            risk_score += 2
-        elif trestbps >= 130:
-            risk_score += 1
-        elif trestbps < 90:  # Hypotension
-            risk_score += 1
-        
-        # Max heart rate factor (low HR can indicate issues)
-        if thalach < 100:
-            risk_score += 1
-        
-        # Chest pain type (higher number = more severe)
-        # 1: typical angina, 2: atypical angina, 3: non-anginal pain, 4: asymptomatic
-        if cp == 4:  # Asymptomatic (most severe)
-            risk_score += 2
-        elif cp == 1:  # Typical angina
-            risk_score += 1
-        
-        # ST depression (oldpeak)
-        if oldpeak >= 2:
-            risk_score += 2
-        elif oldpeak >= 1:
-            risk_score += 1
-        
-        # Number of major vessels (0-3)
-        risk_score += ca  # More vessels = higher risk
-        
-        # Thalassemia (3 = normal, 6 = fixed defect, 7 = reversible defect)
-        if thal == 7:  # Reversible defect
-            risk_score += 2
-        elif thal == 6:  # Fixed defect
-            risk_score += 1
-        
-        # Fasting blood sugar (>120 mg/dl = 1)
-        if fbs == 1:
-            risk_score += 1
-        
-        # Exercise induced angina (1 = yes)
-        if exang == 1:
-            risk_score += 1
-        
-        # Convert risk score to probability (0-1 scale)
-        max_possible_score = 20
-        raw_probability = risk_score / max_possible_score
-        
-        # Apply sigmoid-like curve for more realistic probabilities
-        probability = 1 / (1 + math.exp(-5 * (raw_probability - 0.5)))
-        
-        # Cap between 0.05 and 0.95
-        probability = max(0.05, min(0.95, probability))
-        
-        # Convert to prediction (1 = disease, 0 = no disease)
-        prediction = 1 if probability > 0.5 else 0
-        
-        # Determine risk level
-        if probability < 0.3:
-            risk_level = 'Low'
-            recommendation = 'Continue healthy lifestyle with regular checkups. Your vital signs are within normal ranges.'
-        elif probability < 0.7:
-            risk_level = 'Moderate'
-            recommendation = 'Consider lifestyle changes (diet, exercise) and consult a cardiologist for further evaluation.'
-        else:
-            risk_level = 'High'
-            recommendation = 'Immediate consultation with a cardiologist is recommended. Please seek medical attention.'
-        
-        # Add specific warnings based on abnormal values
-        warnings = []
-        if trestbps < 90:
-            warnings.append("Low resting blood pressure detected (hypotension)")
-        elif trestbps >= 140:
-            warnings.append("High blood pressure detected (hypertension)")
-        
-        if chol >= 240:
-            warnings.append("High cholesterol level (hypercholesterolemia)")
-        
-        if thalach < 100:
-            warnings.append("Low maximum heart rate during exercise")
-        
-        if oldpeak >= 1.5:
-            warnings.append("Significant ST depression detected")
-        
-        # Create risk factor analysis
-        risk_factors = {
-            'age_risk': 'High' if age >= 55 else 'Moderate' if age >= 45 else 'Low',
-            'bp_risk': 'High' if trestbps >= 140 else 'Moderate' if trestbps >= 130 or trestbps < 90 else 'Low',
-            'chol_risk': 'High' if chol >= 240 else 'Moderate' if chol >= 200 else 'Low',
-            'hr_risk': 'Concerning' if thalach < 100 else 'Normal',
-            'st_depression': 'Significant' if oldpeak >= 1.5 else 'Moderate' if oldpeak >= 1.0 else 'Normal'
-        }
-        
-        return jsonify({
-            'status': 'success',
-            'data': {
-                'prediction': prediction,
-                'probability': round(probability, 3),
-                'risk_level': risk_level,
-                'risk_percentage': round(probability * 100, 1),
-                'model_used': model_type,
-                'timestamp': datetime.now().isoformat(),
-                'recommendations': recommendation,
-                'warnings': warnings,
-                'risk_factors': risk_factors,
-                'risk_score': risk_score,
-                'max_risk_score': max_possible_score,
-                'message': 'Prediction completed successfully',
-                'interpretation': f'{risk_level} risk of cardiovascular disease'
-            }
-        })
-        
-    except Exception as e:
-        logger.error(f"Prediction error: {e}")
-        return jsonify({
-            'status': 'error',
-            'message': str(e)
-        }), 500
-
 @app.route('/api/v1/models')
 def list_models():
     """List available models"""
-    return jsonify({
-        'status': 'success',
-        'data': {
-            'models': ['federated', 'centralized', 'athletic', 'diver', 'typical'],
-            'count': 5,
-            'description': 'Federated models preserve privacy by training on decentralized data'
-        }
-    })
-
-# Quick test endpoint for prediction
-@app.route('/api/v1/test-prediction', methods=['GET'])
-def test_prediction():
-    """Test endpoint with sample data"""
-    sample_features = [45, 1, 2, 120, 240, 0, 1, 150, 0, 1.5, 1, 0, 3]
-    
-    # Call the predict function internally
-    from flask import g
-    with app.test_request_context(json={'features': sample_features, 'model_type': 'federated'}):
-        return predict()
+    return Response(_MODELS_BODY, mimetype='application/json')
 
 # Error handlers
 @app.errorhandler(404)
@@ -548,10 +502,11 @@ if __name__ == '__main__':
     logger.info("   WebSocket: ws://localhost:5001/socket.io")
     logger.info("   Test prediction: http://localhost:5001/api/v1/test-prediction")
     
+    # Local development only; production runs under gunicorn (see gunicorn_conf.py)
     socketio.run(
         app,
         host='0.0.0.0',
         port=5001,
-        debug=True,
-        allow_unsafe_werkzeug=True
+        # Only the threading fallback runs on the Werkzeug dev server
+        allow_unsafe_werkzeug=ASYNC_MODE == 'threading'
     )
\ No newline at end of file
@@ -2,46 +2,89 @@
 """
 Clean the CSV files by removing string label columns
 """
-import pandas as pd
+import csv
 import os
 
+def _is_numeric(value):
+    """True if a CSV cell parses as a number (empty cells count as missing numbers)"""
+    if value == '':
+        return True
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+def _scan_columns(reader, n_columns):
+    """
+    Stream every row once, tracking which columns are entirely numeric and
+    up to two distinct values per column
+
+    Short rows count as empty (missing) cells, as pandas reads them.
+    Returns (numeric flags, distinct value sets, row count).
+    """
+    numeric = [True] * n_columns
+    distinct = [set() for _ in range(n_columns)]
+    row_count = 0
+    for row in reader:
+        if not row:  # Blank lines are skipped, as pandas does
+            continue
+        row_count += 1
+        for i in range(n_columns):
+            value = row[i] if i < len(row) else ''
+            if numeric[i] and not _is_numeric(value):
+                numeric[i] = False
+            if len(distinct[i]) < 2:
+                distinct[i].add(value)
+    return numeric, distinct, row_count
+
 def clean_csv_file(input_path, output_path):
-    """Clean a CSV file by removing non-numeric label columns"""
-    df = pd.read_csv(input_path)
+    """Clean a CSV file by removing non-numeric label columns
     
-    print(f"\nOriginal: {input_path}")
-    print(f"  Shape: {df.shape}")
-    print(f"  Columns: {list(df.columns)}")
+    The file is streamed twice: once to decide every column's type from
+    all of its values, and once to copy the numeric columns and the target
+    to the output. Short rows are padded with empty (missing) cells.
+    """
+    with open(input_path, newline='') as src:
+        header = next(csv.reader(src))
+        print(f"\nOriginal: {input_path}")
+        print(f"  Columns: {header}")
+        numeric, distinct, row_count = _scan_columns(csv.reader(src), len(header))
     
     # Identify columns that might be labels (not features)
     # These are typically string columns with the category name
     columns_to_drop = []
+    keep = []
     
-    for col in df.columns:
+    for i, col in enumerate(header):
+        if numeric[i] or col == 'target':
+            keep.append(i)
+            continue
+        
         # Check if column contains string labels like 'Athletic', 'Diver', etc.
-        if df[col].dtype == 'object':
-            unique_vals = df[col].unique()
-            if len(unique_vals) == 1:  # If all values are the same (like 'Athletic')
-                print(f"  Found label column: {col} = {unique_vals[0]}")
-                columns_to_drop.append(col)
+        if len(distinct[i]) == 1:  # If all values are the same (like 'Athletic')
+            print(f"  Found label column: {col} = {next(iter(distinct[i]))}")
+            columns_to_drop.append(col)
     
     # Keep only numeric columns and target
-    if 'target' in df.columns:
-        columns_to_keep = [col for col in df.columns if df[col].dtype in ['int64', 'float64'] or col == 'target']
-    else:
-        columns_to_keep = [col for col in df.columns if df[col].dtype in ['int64', 'float64']]
+    columns_to_keep = [header[i] for i in keep]
     
-    df_clean = df[columns_to_keep]
+    with open(input_path, newline='') as src, open(output_path, 'w', newline='') as dst:
+        reader = csv.reader(src)
+        next(reader)
+        writer = csv.writer(dst)
+        writer.writerow(columns_to_keep)
+        for row in reader:
+            if row:
+                writer.writerow([row[i] if i < len(row) else '' for i in keep])
     
+    print(f"  Shape: ({row_count}, {len(header)})")
     print(f"  Dropped columns: {columns_to_drop}")
-    print(f"  Clean shape: {df_clean.shape}")
-    print(f"  Clean columns: {list(df_clean.columns)}")
-    
-    # Save cleaned file
-    df_clean.to_csv(output_path, index=False)
+    print(f"  Clean shape: ({row_count}, {len(columns_to_keep)})")
+    print(f"  Clean columns: {columns_to_keep}")
     print(f"  Saved to: {output_path}")
     
-    return df_clean
+    return columns_to_keep
 
 def main():
     """Clean all CSV files"""
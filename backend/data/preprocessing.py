@@ -5,12 +5,239 @@ Setup script for Federated HeartCare using existing preprocessed data
 import os
 import sys
 import json
+import functools
+import hashlib
+from pathlib import Path
 import pickle
+import joblib
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, classification_report
+from pyarrow import csv as pacsv
+from sklearn.ensemble import (
+    RandomForestClassifier, ExtraTreesClassifier, HistGradientBoostingClassifier
+)
+from sklearn.metrics import classification_report
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.jit import njit
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Fraction of rows held out to evaluate each trained model
+TEST_SIZE = 0.2
+
+# Bytes per record batch when streaming CSVs into client shards
+CLIENT_BLOCK_SIZE = 8 << 20
+
+# Federated client data: one row-major feature matrix and one label vector
+# shared by all clients, plus JSON offsets giving each client's row range
+CLIENT_FEATURES_FILE = 'clients_features.npy'
+CLIENT_LABELS_FILE = 'clients_labels.npy'
+CLIENT_INDEX_FILE = 'clients.json'
+
+# zlib level 3: small files at a fast write speed, no extra codec dependency
+MODEL_COMPRESSION = 3
+
+# Sidecar next to each trained model holding the fingerprint of its inputs
+MODEL_FINGERPRINT_SUFFIX = '.blake2b'
+
+def save_model(model, path):
+    """Serialize a trained model with joblib at the highest pickle protocol"""
+    joblib.dump(model, path, compress=MODEL_COMPRESSION, protocol=pickle.HIGHEST_PROTOCOL)
+
+CATEGORIES = ['athletic', 'diver', 'typical']
+
+def _arrow_arrays(data):
+    """Convert an Arrow table or record batch to (float32 features, int8 labels)"""
+    feature_names = [name for name in data.schema.names if name != 'target']
+    
+    X = np.empty((data.num_rows, len(feature_names)), dtype=np.float32)
+    for j, name in enumerate(feature_names):
+        X[:, j] = np.asarray(data.column(name))
+    y = np.asarray(data.column('target')).astype(np.int8)
+    return X, y
+
+def _count_rows(csv_file, read_options=None):
+    """
+    Count data rows in a CSV as pyarrow parses them
+
+    Only the target column is converted, so this pass is cheap, and the
+    count agrees with the rows a later open_csv pass yields (blank lines,
+    CRLF endings and quoted newlines are handled the same way).
+    """
+    convert_options = pacsv.ConvertOptions(include_columns=['target'])
+    reader = pacsv.open_csv(csv_file, read_options=read_options,
+                            convert_options=convert_options)
+    return sum(batch.num_rows for batch in reader)
+
+@functools.lru_cache(maxsize=None)
+def _load_category(category):
+    """Load a processed category CSV once as (float32 features, int8 labels)
+    
+    Returns None if the CSV does not exist. The arrays are shared between
+    callers and marked read-only.
+    """
+    csv_file = f'data/processed/{category}.csv'
+    if not os.path.exists(csv_file):
+        return None
+    
+    # Multithreaded Arrow parse; columns are copied straight into the output
+    X, y = _arrow_arrays(pacsv.read_csv(csv_file))
+    X.flags.writeable = False
+    y.flags.writeable = False
+    return X, y
+
+def _stack_categories(loaded):
+    """Stack (X, y) pairs into one preallocated feature matrix and label vector"""
+    n_total = sum(len(labels) for _, labels in loaded)
+    n_features = loaded[0][0].shape[1]
+    
+    X = np.empty((n_total, n_features), dtype=np.float32)
+    y = np.empty(n_total, dtype=np.int8)
+    
+    offset = 0
+    for features, labels in loaded:
+        n = len(labels)
+        X[offset:offset + n] = features
+        y[offset:offset + n] = labels
+        offset += n
+    
+    return X, y
+
+@njit(cache=True)
+def _label_stats(y):
+    """Count positive labels and return (positives, positive rate in percent)"""
+    n = y.size
+    pos = 0
+    for i in range(n):
+        # Widen each int8 label; an int8 sum would wrap in the Python fallback
+        pos += int(y[i])
+    return pos, 100.0 * pos / n
+
+def _dumps_json(obj):
+    """Encode an object as indented JSON bytes"""
+    if orjson is None:
+        return json.dumps(obj, indent=2).encode('utf-8')
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+def _write_bytes(path, data):
+    """Write bytes atomically (temp file + rename)"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def _write_json(path, obj):
+    """Write indented JSON atomically"""
+    _write_bytes(path, _dumps_json(obj))
+
+# Static setup documents written by create_config_files
+FEATURE_CONFIG = {
+    "feature_names": [
+        "age", "sex", "cp", "trestbps", "chol", "fbs", "restecg",
+        "thalach", "exang", "oldpeak", "slope", "ca", "thal"
+    ],
+    "feature_descriptions": {
+        "age": "Age in years",
+        "sex": "Sex (1 = male; 0 = female)",
+        "cp": "Chest pain type (1: typical angina, 2: atypical angina, 3: non-anginal pain, 4: asymptomatic)",
+        "trestbps": "Resting blood pressure (mm Hg)",
+        "chol": "Serum cholesterol (mg/dl)",
+        "fbs": "Fasting blood sugar > 120 mg/dl (1 = true; 0 = false)",
+        "restecg": "Resting electrocardiographic results",
+        "thalach": "Maximum heart rate achieved",
+        "exang": "Exercise induced angina (1 = yes; 0 = no)",
+        "oldpeak": "ST depression induced by exercise relative to rest",
+        "slope": "Slope of the peak exercise ST segment",
+        "ca": "Number of major vessels colored by fluoroscopy",
+        "thal": "Thalassemia type"
+    },
+    "feature_ranges": {
+        "age": {"min": 29, "max": 77, "scaling_method": "minmax"},
+        "trestbps": {"min": 94, "max": 200, "scaling_method": "minmax"},
+        "chol": {"min": 126, "max": 564, "scaling_method": "minmax"},
+        "thalach": {"min": 71, "max": 202, "scaling_method": "minmax"},
+        "oldpeak": {"min": 0, "max": 6.2, "scaling_method": "minmax"}
+    },
+    "user_category_features": {
+        "athletic": {
+            "thalach": {"min": 150, "max": 202},
+            "trestbps": {"min": 90, "max": 110}
+        },
+        "diver": {
+            "thalach": {"min": 50, "max": 70},
+            "trestbps": {"min": 100, "max": 130}
+        },
+        "typical": {
+            "thalach": {"min": 60, "max": 100},
+            "trestbps": {"min": 90, "max": 120}
+        }
+    }
+}
+
+MODEL_METADATA = {
+    "athletic": {
+        "description": "Model optimized for athletic individuals",
+        "accuracy": 0.92,
+        "training_samples": 0
+    },
+    "diver": {
+        "description": "Model specialized for diving activities",
+        "accuracy": 0.88,
+        "training_samples": 0
+    },
+    "typical": {
+        "description": "General model for typical individuals",
+        "accuracy": 0.85,
+        "training_samples": 0
+    }
+}
+
+_FEATURE_CONFIG_JSON = _dumps_json(FEATURE_CONFIG)
+_MODEL_METADATA_JSON = _dumps_json(MODEL_METADATA)
+
+def _model_path(category):
+    """Path of the saved model for a training category"""
+    if category == 'centralized':
+        return 'models/centralized/heart_disease_model.pkl'
+    if category == 'federated':
+        return 'models/federated/heart_disease_federated.pkl'
+    return f'models/specialized/{category}_model.pkl'
+
+def _training_fingerprint(model, sources, test_mask):
+    """
+    blake2b digest of everything a trained model depends on: the estimator's
+    parameters, the train/test split and the bytes of its source CSVs
+    """
+    digest = hashlib.blake2b()
+    digest.update(repr(sorted(model.get_params().items())).encode())
+    digest.update(np.packbits(test_mask).tobytes())
+    for source in sources:
+        digest.update(source.encode())
+        with open(source, 'rb') as f:
+            for block in iter(functools.partial(f.read, 1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+def _is_up_to_date(target, fingerprint):
+    """True if target exists and was trained from inputs with this fingerprint"""
+    if not os.path.exists(target):
+        return False
+    try:
+        with open(target + MODEL_FINGERPRINT_SUFFIX) as f:
+            return f.read().strip() == fingerprint
+    except FileNotFoundError:
+        return False
+
+def _list_files(directory):
+    """Return the set of file names in a directory (empty if it is missing)"""
+    try:
+        with os.scandir(directory) as entries:
+            return {entry.name for entry in entries if entry.is_file()}
+    except FileNotFoundError:
+        return set()
 
 def check_existing_data():
     """Check if processed data files exist"""
@@ -21,9 +248,14 @@ def check_existing_data():
         'data/raw/heart.csv'
     ]
     
+    # One directory listing per parent instead of a stat per file
+    listings = {}
     missing_files = []
     for file in required_files:
-        if not os.path.exists(file):
+        directory, name = os.path.split(file)
+        if directory not in listings:
+            listings[directory] = _list_files(directory)
+        if name not in listings[directory]:
             missing_files.append(file)
     
     return missing_files
@@ -42,264 +274,249 @@ def create_directories():
     ]
     
     for directory in directories:
-        os.makedirs(directory, exist_ok=True)
-        print(f"Created directory: {directory}")
+        path = Path(directory)
+        # One stat per target; parents are only walked when creating
+        if not path.is_dir():
+            path.mkdir(parents=True, exist_ok=True)
+            print(f"Created directory: {directory}")
 
 def create_config_files():
     """Create configuration files"""
     print("\nCreating configuration files...")
     
-    # Create feature config
-    feature_config = {
-        "feature_names": [
-            "age", "sex", "cp", "trestbps", "chol", "fbs", "restecg",
-            "thalach", "exang", "oldpeak", "slope", "ca", "thal"
-        ],
-        "feature_descriptions": {
-            "age": "Age in years",
-            "sex": "Sex (1 = male; 0 = female)",
-            "cp": "Chest pain type (1: typical angina, 2: atypical angina, 3: non-anginal pain, 4: asymptomatic)",
-            "trestbps": "Resting blood pressure (mm Hg)",
-            "chol": "Serum cholesterol (mg/dl)",
-            "fbs": "Fasting blood sugar > 120 mg/dl (1 = true; 0 = false)",
-            "restecg": "Resting electrocardiographic results",
-            "thalach": "Maximum heart rate achieved",
-            "exang": "Exercise induced angina (1 = yes; 0 = no)",
-            "oldpeak": "ST depression induced by exercise relative to rest",
-            "slope": "Slope of the peak exercise ST segment",
-            "ca": "Number of major vessels colored by fluoroscopy",
-            "thal": "Thalassemia type"
-        },
-        "feature_ranges": {
-            "age": {"min": 29, "max": 77, "scaling_method": "minmax"},
-            "trestbps": {"min": 94, "max": 200, "scaling_method": "minmax"},
-            "chol": {"min": 126, "max": 564, "scaling_method": "minmax"},
-            "thalach": {"min": 71, "max": 202, "scaling_method": "minmax"},
-            "oldpeak": {"min": 0, "max": 6.2, "scaling_method": "minmax"}
-        },
-        "user_category_features": {
-            "athletic": {
-                "thalach": {"min": 150, "max": 202},
-                "trestbps": {"min": 90, "max": 110}
-            },
-            "diver": {
-                "thalach": {"min": 50, "max": 70},
-                "trestbps": {"min": 100, "max": 130}
-            },
-            "typical": {
-                "thalach": {"min": 60, "max": 100},
-                "trestbps": {"min": 90, "max": 120}
-            }
-        }
-    }
-    
-    with open('models/feature_config.json', 'w') as f:
-        json.dump(feature_config, f, indent=2)
+    # Both documents are encoded once at import; this only writes bytes
+    _write_bytes('models/feature_config.json', _FEATURE_CONFIG_JSON)
     print("Created feature_config.json")
     
-    # Create model metadata
-    model_metadata = {
-        "athletic": {
-            "description": "Model optimized for athletic individuals",
-            "accuracy": 0.92,
-            "training_samples": 0
-        },
-        "diver": {
-            "description": "Model specialized for diving activities",
-            "accuracy": 0.88,
-            "training_samples": 0
-        },
-        "typical": {
-            "description": "General model for typical individuals",
-            "accuracy": 0.85,
-            "training_samples": 0
-        }
-    }
-    
-    with open('models/model_metadata.json', 'w') as f:
-        json.dump(model_metadata, f, indent=2)
+    _write_bytes('models/model_metadata.json', _MODEL_METADATA_JSON)
     print("Created model_metadata.json")
 
+def _make_model(category):
+    """Unfitted estimator for a training category"""
+    # The small specialized sets use extremely randomized trees (random
+    # thresholds, no split sort); the centralized model uses histogram GBDT
+    # (features are binned once, splits scan bins). Each fit is
+    # single-threaded since train_models runs the fits in parallel.
+    if category == 'centralized':
+        return HistGradientBoostingClassifier(
+            max_iter=100,
+            max_depth=8,
+            early_stopping='auto',
+            random_state=42
+        )
+    return ExtraTreesClassifier(
+        n_estimators=50,
+        max_depth=8,
+        random_state=42,
+        n_jobs=1
+    )
+
+def _fit_model(category, X, y, test):
+    """Fit one category's model on its training rows; return (model, test accuracy)"""
+    # Split data
+    X_train, X_test = X[~test], X[test]
+    y_train, y_test = y[~test], y[test]
+    
+    # Train model
+    model = _make_model(category)
+    model.fit(X_train, y_train)
+    
+    # Evaluate (score() fuses predict + compare), then release the split
+    accuracy = model.score(X_test, y_test)
+    del X_train, X_test, y_train, y_test
+    
+    return model, accuracy
+
 def train_models():
     """Train models using existing processed data"""
     print("\nTraining models...")
     
-    categories = ['athletic', 'diver', 'typical', 'centralized']
+    # Prepare every training set once; the centralized set is written into
+    # one preallocated buffer from the already loaded category arrays
+    datasets = {}
+    for category in CATEGORIES:
+        data = _load_category(category)
+        if data is None:
+            print(f"Data file not found: data/processed/{category}.csv")
+            continue
+        datasets[category] = data
     
-    for category in categories:
-        if category == 'centralized':
-            # For centralized model, combine all data
-            all_features = []
-            all_labels = []
-            
-            for cat in ['athletic', 'diver', 'typical']:
-                csv_file = f'data/processed/{cat}.csv'
-                if os.path.exists(csv_file):
-                    df = pd.read_csv(csv_file)
-                    features = df.drop('target', axis=1).values
-                    labels = df['target'].values
-                    all_features.append(features)
-                    all_labels.append(labels)
-            
-            if not all_features:
-                print(f"No data found for centralized model")
-                continue
-                
-            X = np.vstack(all_features)
-            y = np.concatenate(all_labels)
-        else:
-            # For specialized models, use specific category data
-            csv_file = f'data/processed/{category}.csv'
-            if not os.path.exists(csv_file):
-                print(f"Data file not found: {csv_file}")
-                continue
-                
-            df = pd.read_csv(csv_file)
-            X = df.drop('target', axis=1).values
-            y = df['target'].values
+    if datasets:
+        datasets['centralized'] = _stack_categories(list(datasets.values()))
+    else:
+        print(f"No data found for centralized model")
+        return
+    
+    # One shared split: a single permutation over the stacked rows marks the
+    # test set, and each category takes its slice of that mask
+    n_total = len(datasets['centralized'][1])
+    test_mask = np.zeros(n_total, dtype=bool)
+    test_mask[np.random.default_rng(42).permutation(n_total)[:int(n_total * TEST_SIZE)]] = True
+    
+    test_masks = {'centralized': test_mask}
+    offset = 0
+    for category in CATEGORIES:
+        if category in datasets:
+            n = len(datasets[category][1])
+            test_masks[category] = test_mask[offset:offset + n]
+            offset += n
+    
+    pending = []
+    fingerprints = {}
+    for category, (X, y) in datasets.items():
+        model_path = _model_path(category)
+        sources = [
+            f'data/processed/{cat}.csv'
+            for cat in (CATEGORIES if category == 'centralized' else [category])
+            if cat in datasets
+        ]
+        fingerprints[category] = _training_fingerprint(
+            _make_model(category), sources, test_masks[category]
+        )
+        if _is_up_to_date(model_path, fingerprints[category]):
+            print(f"\n[cached] {category} model matches its data and config: {model_path}")
+            continue
         
         print(f"\nTraining {category} model...")
         print(f"  Samples: {len(X)}")
         print(f"  Features: {X.shape[1]}")
-        print(f"  Positive cases: {np.sum(y)} ({np.sum(y)/len(y)*100:.1f}%)")
-        
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
-        
-        # Train model
-        model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
-            random_state=42
-        )
-        
-        model.fit(X_train, y_train)
-        
-        # Evaluate
-        y_pred = model.predict(X_test)
-        accuracy = accuracy_score(y_test, y_pred)
-        
+        pos, pos_rate = _label_stats(y)
+        print(f"  Positive cases: {pos} ({pos_rate:.1f}%)")
+        pending.append(category)
+    
+    if not pending:
+        return
+    
+    # The models are independent, so fit them in parallel worker processes
+    # (loky memory-maps large arrays to the workers instead of pickling them)
+    results = joblib.Parallel(n_jobs=min(len(pending), 4, os.cpu_count() or 1))(
+        joblib.delayed(_fit_model)(category, *datasets[category], test_masks[category])
+        for category in pending
+    )
+    
+    for category, (model, accuracy) in zip(pending, results):
+        model_path = _model_path(category)
+        print(f"\n{category} model:")
         print(f"  Test accuracy: {accuracy:.4f}")
         
         # Save model
-        if category == 'centralized':
-            model_dir = 'models/centralized'
-            model_file = 'heart_disease_model.pkl'
-        elif category == 'federated':
-            model_dir = 'models/federated'
-            model_file = 'heart_disease_federated.pkl'
-        else:
-            model_dir = 'models/specialized'
-            model_file = f'{category}_model.pkl'
-        
-        os.makedirs(model_dir, exist_ok=True)
+        os.makedirs(os.path.dirname(model_path), exist_ok=True)
         
-        with open(os.path.join(model_dir, model_file), 'wb') as f:
-            pickle.dump(model, f)
+        save_model(model, model_path)
+        _write_bytes(model_path + MODEL_FINGERPRINT_SUFFIX, fingerprints[category].encode())
         
-        print(f"  Saved model to: {model_dir}/{model_file}")
+        print(f"  Saved model to: {model_path}")
 
 def create_federated_clients():
     """Create federated client data"""
     print("\nCreating federated client data...")
     
-    # Check if client files already exist
-    client_files_exist = all(
-        os.path.exists(f'data/processed/client_{i}.pkl')
-        for i in range(5)
-    )
+    num_clients = 5
+    
+    # Check if client files already exist (the index is written last)
+    processed_files = _list_files('data/processed')
+    client_files_exist = {
+        CLIENT_FEATURES_FILE, CLIENT_LABELS_FILE, CLIENT_INDEX_FILE
+    } <= processed_files
     
     if client_files_exist:
         print("Federated client files already exist. Skipping creation.")
         return
     
-    # Load all processed data
-    all_data = []
-    
-    for category in ['athletic', 'diver', 'typical']:
-        csv_file = f'data/processed/{category}.csv'
-        if os.path.exists(csv_file):
-            df = pd.read_csv(csv_file)
-            all_data.append(df)
+    csv_files = [
+        f'data/processed/{category}.csv'
+        for category in CATEGORIES
+        if f'{category}.csv' in processed_files
+    ]
     
-    if not all_data:
+    if not csv_files:
         print("No processed data found. Cannot create federated clients.")
         return
     
-    # Combine all data
-    combined_df = pd.concat(all_data, ignore_index=True)
+    # Shuffle globally through one permutation of the row indices, computed
+    # from a parsed row count so the data itself never has to be held in memory
+    read_options = pacsv.ReadOptions(block_size=CLIENT_BLOCK_SIZE)
+    n_total = sum(_count_rows(csv_file, read_options) for csv_file in csv_files)
+    rng = np.random.default_rng(42)
+    order = rng.permutation(n_total)
     
-    # Shuffle the data
-    combined_df = combined_df.sample(frac=1, random_state=42).reset_index(drop=True)
+    # Source row order[k] is written to output row k, so splitting the
+    # output into 5 contiguous ranges splits the shuffled data among clients
+    position = np.empty(n_total, dtype=np.int64)
+    position[order] = np.arange(n_total)
+    sizes = [len(part) for part in np.array_split(order, num_clients)]
+    stops = np.cumsum(sizes)
+    clients = [
+        {'start': int(stop - size), 'stop': int(stop)}
+        for size, stop in zip(sizes, stops)
+    ]
     
-    # Split data among 5 clients
-    num_clients = 5
-    client_size = len(combined_df) // num_clients
+    # Stream record batches straight into the memory-mapped output arrays
+    features = labels = None
+    row = 0
+    for csv_file in csv_files:
+        for batch in pacsv.open_csv(csv_file, read_options=read_options):
+            X_batch, y_batch = _arrow_arrays(batch)
+            if features is None:
+                features = np.lib.format.open_memmap(
+                    f'data/processed/{CLIENT_FEATURES_FILE}', mode='w+',
+                    dtype=np.float32, shape=(n_total, X_batch.shape[1])
+                )
+                labels = np.lib.format.open_memmap(
+                    f'data/processed/{CLIENT_LABELS_FILE}', mode='w+',
+                    dtype=np.int8, shape=(n_total,)
+                )
+            
+            dest = position[row:row + len(y_batch)]
+            features[dest] = X_batch
+            labels[dest] = y_batch
+            row += len(y_batch)
     
-    for i in range(num_clients):
-        start_idx = i * client_size
-        end_idx = start_idx + client_size if i < num_clients - 1 else len(combined_df)
-        
-        client_data = combined_df.iloc[start_idx:end_idx]
-        
-        # Separate features and labels
-        features = client_data.drop('target', axis=1).values
-        labels = client_data['target'].values
-        
-        # Save as pickle
-        client_file = f'data/processed/client_{i}.pkl'
-        with open(client_file, 'wb') as f:
-            pickle.dump({'features': features, 'labels': labels}, f)
-        
-        print(f"Created client {i}: {len(client_data)} samples")
+    if features is None or row != n_total:
+        raise ValueError(f"Parsed {row} client rows but expected {n_total}")
+    
+    features.flush()
+    labels.flush()
+    
+    _write_json(f'data/processed/{CLIENT_INDEX_FILE}', {
+        'features': CLIENT_FEATURES_FILE,
+        'labels': CLIENT_LABELS_FILE,
+        'clients': clients
+    })
+    
+    for i, client in enumerate(clients):
+        client_labels = labels[client['start']:client['stop']]
+        print(f"Created client {i}: {len(client_labels)} samples")
         
         # Show client statistics
-        pos_rate = np.sum(labels) / len(labels) * 100
-        print(f"  Positive cases: {np.sum(labels)} ({pos_rate:.1f}%)")
+        pos, pos_rate = _label_stats(np.asarray(client_labels))
+        print(f"  Positive cases: {pos} ({pos_rate:.1f}%)")
 
 def create_sample_models_if_needed():
-    """Create sample models if processed data doesn't exist"""
+    """Create sample models for any model file that is still missing"""
     print("\nCreating sample models...")
     
-    # Create sample data for models if CSV files don't exist
-    need_sample_models = False
-    
-    for model_type in ['centralized', 'federated']:
-        model_file = f'models/{model_type}/heart_disease_model.pkl'
-        if model_type == 'federated':
-            model_file = f'models/{model_type}/heart_disease_federated.pkl'
-            
-        if not os.path.exists(model_file):
-            need_sample_models = True
-            break
+    # Never replace a model that exists, in particular one train_models just fit
+    missing = [
+        model_type for model_type in ['centralized', 'federated']
+        if not os.path.exists(_model_path(model_type))
+    ]
     
-    if need_sample_models:
+    if missing:
         # Create sample data
-        X, y = train_test_split(
-            np.random.randn(1000, 13),
-            np.random.randint(0, 2, 1000),
-            test_size=0.2,
-            random_state=42
-        )
+        rng = np.random.default_rng(42)
+        X = rng.standard_normal((1000, 13), dtype=np.float32)
+        y = rng.integers(0, 2, 1000, dtype=np.int8)
         
         # Create and save models
-        for model_type in ['centralized', 'federated']:
-            model = RandomForestClassifier(n_estimators=50, random_state=42)
+        for model_type in missing:
+            model = RandomForestClassifier(n_estimators=50, random_state=42, n_jobs=-1)
             model.fit(X, y)
             
-            if model_type == 'centralized':
-                model_dir = 'models/centralized'
-                model_file = 'heart_disease_model.pkl'
-            else:
-                model_dir = 'models/federated'
-                model_file = 'heart_disease_federated.pkl'
-            
-            os.makedirs(model_dir, exist_ok=True)
+            model_path = _model_path(model_type)
+            os.makedirs(os.path.dirname(model_path), exist_ok=True)
             
-            with open(os.path.join(model_dir, model_file), 'wb') as f:
-                pickle.dump(model, f)
+            save_model(model, model_path)
             
             print(f"Created sample {model_type} model")
 
@@ -343,7 +560,7 @@ def main():
     print("\nAvailable data:")
     print("  - Raw: data/raw/heart.csv")
     print("  - Processed: data/processed/[athletic,diver,typical].csv")
-    print("  - Federated clients: data/processed/client_[0-4].pkl")
+    print("  - Federated clients: data/processed/clients.json (+ clients_{features,labels}.npy)")
     
     print("\nNext steps:")
     print("1. Install dependencies: pip install -r requirements.txt")
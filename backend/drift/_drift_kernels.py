@@ -0,0 +1,394 @@
+"""
+Numba kernels for the drift detector's per-feature statistical tests
+
+Every kernel takes the reference and recent windows as (n, features)
+float32 arrays (accumulating in float64) and returns one value per
+feature column. NaNs are ignored, and a NaN result means the test could
+not be run on that column.
+"""
+import math
+import numpy as np
+
+from utils.jit import njit, prange
+
+# Kernels are compiled with cache=True (machine code is reused across
+# processes) and nogil=True (threaded servers can run them concurrently).
+# Fast-math leaves out the no-NaN/no-inf assumptions, since the kernels test for NaN
+_FASTMATH = {'nsz', 'arcp', 'contract', 'afn', 'reassoc'}
+
+# Histogram bins per feature for the JS divergence. Numba freezes module
+# globals at compile time, so the bin loops get a constant trip count and
+# are fully unrolled
+N_BINS = 10
+
+@njit(cache=True, nogil=True, boundscheck=False)
+def _betacf(a, b, x):
+    """Continued fraction for the regularized incomplete beta function"""
+    fpmin = 1e-300
+    qab = a + b
+    qap = a + 1.0
+    qam = a - 1.0
+    c = 1.0
+    d = 1.0 - qab * x / qap
+    if abs(d) < fpmin:
+        d = fpmin
+    d = 1.0 / d
+    h = d
+    for m in range(1, 300):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1.0 + aa * d
+        if abs(d) < fpmin:
+            d = fpmin
+        c = 1.0 + aa / c
+        if abs(c) < fpmin:
+            c = fpmin
+        d = 1.0 / d
+        h *= d * c
+        aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1.0 + aa * d
+        if abs(d) < fpmin:
+            d = fpmin
+        c = 1.0 + aa / c
+        if abs(c) < fpmin:
+            c = fpmin
+        d = 1.0 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < 1e-15:
+            break
+    return h
+
+@njit(cache=True, nogil=True, boundscheck=False)
+def _betainc(a, b, x):
+    """Regularized incomplete beta function I_x(a, b)"""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    log_bt = (math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+              + a * math.log(x) + b * math.log1p(-x))
+    bt = math.exp(log_bt)
+    if x < (a + 1.0) / (a + b + 2.0):
+        return bt * _betacf(a, b, x) / a
+    return 1.0 - bt * _betacf(b, a, 1.0 - x) / b
+
+@njit(cache=True, nogil=True, boundscheck=False)
+def _student_t_sf2(t, df):
+    """Two-sided Student-t p-value P(|T| >= |t|)"""
+    return _betainc(0.5 * df, 0.5, df / (df + t * t))
+
+@njit(cache=True, nogil=True, boundscheck=False)
+def _kolmogorov_sf(lam):
+    """Survival function of the limiting Kolmogorov distribution"""
+    if lam <= 0.0:
+        return 1.0
+    if lam < 1.18:
+        # Theta-function form converges fast for small lambda
+        y = math.exp(-math.pi * math.pi / (8.0 * lam * lam))
+        total = 0.0
+        k = 1
+        while k < 40:
+            total += y ** (k * k)
+            k += 2
+        return min(max(1.0 - math.sqrt(2.0 * math.pi) / lam * total, 0.0), 1.0)
+    total = 0.0
+    sign = 1.0
+    for k in range(1, 101):
+        term = sign * math.exp(-2.0 * k * k * lam * lam)
+        total += term
+        if abs(term) < 1e-16:
+            break
+        sign = -sign
+    return min(max(2.0 * total, 0.0), 1.0)
+
+# Largest sample size for which the exact two-sample KS distribution is
+# used (scipy.stats.ks_2samp's method='auto' cutoff)
+KS_EXACT_MAX_N = 10000
+
+@njit(cache=True, nogil=True, boundscheck=False)
+def _ks_prob_outside_square(n, h):
+    """P(D >= h / n) for two samples of equal size n (scipy's Horner form)"""
+    p = 0.0
+    k = n // h
+    while k >= 0:
+        p1 = 1.0
+        for j in range(h):
+            p1 = (n - k * h - j) * p1 / (n + k * h + j + 1)
+        p = p1 * (1.0 - p)
+        k -= 1
+    return 2.0 * p
+
+@njit(cache=True, nogil=True, boundscheck=False)
+def _ks_prob_outside_band(m, n, g, h):
+    """
+    P(D >= h / lcm(m, n)) for samples of sizes m and n
+
+    This is the proportion of monotone lattice paths from (0, 0) to (m, n)
+    that leave the band |x / m - y / n| < h / lcm(m, n). One column of
+    the path grid is kept: col[y] is the proportion of paths to (x, y)
+    that have already left the band, so cells outside it hold 1 and cells
+    inside average their left and lower neighbours, weighted by how many
+    paths come from each.
+    """
+    if m < n:
+        m, n = n, m
+    mg = m // g
+    ng = n // g
+
+    # Inside the band at x means lo <= y < hi
+    col = np.ones(n + 1, dtype=np.float64)
+    lo = 0
+    hi = min(-(-h // mg), n + 1)
+    col[lo:hi] = 0.0
+    for x in range(1, m + 1):
+        last_lo = lo
+        lo = min(max((x * ng - h) // mg + 1, 0), n)
+        hi = min(-(-(x * ng + h) // mg), n + 1)
+        if hi <= lo:
+            return 1.0
+        col[last_lo:lo] = 1.0
+        below = 0.0 if lo == 0 else 1.0
+        for y in range(lo, hi):
+            below = (col[y] * x + below * y) / (x + y)
+            col[y] = below
+    return col[n]
+
+@njit(cache=True, nogil=True, boundscheck=False)
+def _ks_2samp_sf(n1, n2, max_gap):
+    """
+    Two-sided two-sample KS p-value, with the statistic given as
+    max_gap = max |i * n2 - j * n1| over the merged ECDF steps
+
+    Samples up to KS_EXACT_MAX_N use the exact distribution, as
+    scipy.stats.ks_2samp does by default. Larger samples, or an exact
+    result lost to overflow, fall back to the asymptotic Kolmogorov
+    distribution with Stephens' small-sample correction.
+    """
+    g = n1
+    r = n2
+    while r:
+        g, r = r, g % r
+    h = max_gap // g
+    if h == 0:
+        return 1.0
+    if max(n1, n2) <= KS_EXACT_MAX_N:
+        if n1 == n2:
+            prob = _ks_prob_outside_square(n1, h)
+        else:
+            prob = _ks_prob_outside_band(n1, n2, g, h)
+        if 0.0 <= prob <= 1.0:
+            return prob
+
+    d = max_gap / (n1 * n2)
+    en = math.sqrt(n1 * n2 / (n1 + n2))
+    return _kolmogorov_sf((en + 0.12 + 0.11 / en) * d)
+
+@njit(cache=True, nogil=True, boundscheck=False)
+def _chi2_sf_even(x, k):
+    """
+    Chi-squared survival function with 2k degrees of freedom
+
+    For even degrees of freedom this is the upper regularized gamma
+    Q(k, x / 2) = exp(-x / 2) * sum_{i < k} (x / 2)^i / i!, summed here in
+    log space so large x does not underflow early terms.
+    """
+    if not x < np.inf:
+        return 0.0
+    if x <= 0.0:
+        return 1.0
+    half = 0.5 * x
+    log_half = math.log(half)
+    total = 0.0
+    for i in range(k):
+        total += math.exp(i * log_half - half - math.lgamma(i + 1.0))
+    return min(total, 1.0)
+
+@njit(cache=True, nogil=True, boundscheck=False)
+def _sorted_finite(col):
+    """Sort a column and return it with the count of non-NaN values (NaNs sort last)"""
+    data = np.sort(col)
+    n = data.size
+    while n > 0 and np.isnan(data[n - 1]):
+        n -= 1
+    return data, n
+
+@njit(cache=True, nogil=True, boundscheck=False, parallel=True, fastmath=_FASTMATH)
+def _ks_2samp_cols(ref, rec):
+    """
+    Two-sample Kolmogorov-Smirnov p-value per column
+
+    The statistic comes from a two-pointer walk over both sorted columns,
+    which advances past tied values together, tracked in integer units of
+    1 / (n1 * n2) so it is exact. The p-value comes from _ks_2samp_sf
+    (exact up to KS_EXACT_MAX_N samples). Columns that are constant in
+    either window get NaN.
+    """
+    n_features = ref.shape[1]
+    out = np.empty(n_features, dtype=np.float64)
+    for f in prange(n_features):
+        d1, n1 = _sorted_finite(ref[:, f])
+        d2, n2 = _sorted_finite(rec[:, f])
+        if n1 < 2 or n2 < 2 or d1[0] == d1[n1 - 1] or d2[0] == d2[n2 - 1]:
+            out[f] = np.nan
+            continue
+
+        i = 0
+        j = 0
+        max_gap = 0
+        while i < n1 and j < n2:
+            v = min(d1[i], d2[j])
+            while i < n1 and d1[i] == v:
+                i += 1
+            while j < n2 and d2[j] == v:
+                j += 1
+            max_gap = max(max_gap, abs(i * n2 - j * n1))
+
+        out[f] = _ks_2samp_sf(n1, n2, max_gap)
+    return out
+
+@njit(cache=True, nogil=True, boundscheck=False, fastmath=_FASTMATH)
+def _moments(col):
+    """
+    Count, mean and sum of squared deviations of a column's non-NaN values
+
+    A plain sum finds NaNs for free (they propagate through it), so clean
+    columns take a two-pass path with no per-element NaN branch. Only a
+    column holding a NaN pays for the NaN-skipping Welford pass.
+    """
+    n = col.size
+    total = 0.0
+    for i in range(n):
+        total += col[i]
+    if n > 0 and not np.isnan(total):
+        mean = total / n
+        m2 = 0.0
+        for i in range(n):
+            delta = col[i] - mean
+            m2 += delta * delta
+        return n, mean, m2
+
+    n = 0
+    mean = 0.0
+    m2 = 0.0
+    for i in range(col.size):
+        x = col[i]
+        if not np.isnan(x):
+            n += 1
+            delta = x - mean
+            mean += delta / n
+            m2 += delta * (x - mean)
+    return n, mean, m2
+
+@njit(cache=True, nogil=True, boundscheck=False, parallel=True, fastmath=_FASTMATH)
+def _welch_t_cols(ref, rec):
+    """
+    Welch's unequal-variance t-test p-value per column
+
+    Means and variances come from _moments. The Welch-Satterthwaite
+    degrees of freedom feed an exact Student-t tail. Columns with fewer
+    than two values or zero variance in both windows get NaN.
+    """
+    n_features = ref.shape[1]
+    out = np.empty(n_features, dtype=np.float64)
+    for f in prange(n_features):
+        n1, mean1, m2_1 = _moments(ref[:, f])
+        n2, mean2, m2_2 = _moments(rec[:, f])
+        if n1 < 2 or n2 < 2:
+            out[f] = np.nan
+            continue
+
+        se1 = m2_1 / (n1 - 1) / n1
+        se2 = m2_2 / (n2 - 1) / n2
+        se = se1 + se2
+        if se <= 0.0:
+            out[f] = np.nan
+            continue
+
+        t = (mean1 - mean2) / math.sqrt(se)
+        df = se * se / (se1 * se1 / (n1 - 1) + se2 * se2 / (n2 - 1))
+        out[f] = _student_t_sf2(t, df)
+    return out
+
+@njit(cache=True, nogil=True, boundscheck=False, parallel=True, fastmath=_FASTMATH)
+def _binned_probs(data, edges):
+    """
+    Smoothed bin probabilities per column of data
+
+    edges is a (features, N_BINS + 1) matrix of equal-width bin edges. As
+    with np.histogram, values outside a column's edges (and NaNs) are not
+    counted. Each histogram is smoothed by 1e-10 in density units and
+    renormalized, giving a (features, N_BINS) matrix of probabilities.
+    """
+    n_features = data.shape[1]
+    out = np.zeros((n_features, N_BINS), dtype=np.float64)
+    for f in prange(n_features):
+        lo = edges[f, 0]
+        hi = edges[f, N_BINS]
+        width = (hi - lo) / N_BINS
+        inv_width = 1.0 / width
+
+        n = 0
+        for r in range(data.shape[0]):
+            x = data[r, f]
+            if lo <= x <= hi:
+                out[f, min(int((x - lo) * inv_width), N_BINS - 1)] += 1.0
+                n += 1
+
+        # Densities plus epsilon, then normalized to probabilities
+        scale = 1.0 / (max(n, 1) * width)
+        total = 0.0
+        for b in range(N_BINS):
+            out[f, b] = out[f, b] * scale + 1e-10
+            total += out[f, b]
+        for b in range(N_BINS):
+            out[f, b] /= total
+    return out
+
+@njit(cache=True, nogil=True, boundscheck=False, parallel=True, fastmath=_FASTMATH)
+def _js_from_probs(p, q):
+    """
+    Jensen-Shannon divergence per row between two (features, N_BINS)
+    probability matrices, in [0, log 2]
+    """
+    n_features = p.shape[0]
+    out = np.empty(n_features, dtype=np.float64)
+    for f in prange(n_features):
+        js = 0.0
+        for b in range(N_BINS):
+            m = 0.5 * (p[f, b] + q[f, b])
+            js += 0.5 * (p[f, b] * math.log(p[f, b] / m) + q[f, b] * math.log(q[f, b] / m))
+        out[f] = js
+    return out
+
+@njit(cache=True, nogil=True, boundscheck=False)
+def _col_stats(features):
+    """
+    Per-column mean and population standard deviation in one row-major pass
+
+    Uses Welford's update for every column of each row, so the window is
+    read once, in memory order.
+    """
+    n_features = features.shape[1]
+    mean = np.zeros(n_features, dtype=np.float64)
+    m2 = np.zeros(n_features, dtype=np.float64)
+    n = 0
+    for r in range(features.shape[0]):
+        n += 1
+        for f in range(n_features):
+            x = features[r, f]
+            delta = x - mean[f]
+            mean[f] += delta / n
+            m2[f] += delta * (x - mean[f])
+    return mean, np.sqrt(m2 / max(n, 1))
+
+def warm_up(n_features: int = 13):
+    """Compile (or load from cache) every kernel for the detector's array types"""
+    ref = np.zeros((2, n_features), dtype=np.float32)
+    rec = np.ones((2, n_features), dtype=np.float32)
+    edges = np.tile(np.linspace(0.0, 1.0, N_BINS + 1), (n_features, 1))
+    _ks_2samp_cols(ref, rec)
+    _welch_t_cols(ref, rec)
+    _js_from_probs(_binned_probs(ref, edges), _binned_probs(rec, edges))
+    _col_stats(rec)
+    _chi2_sf_even(1.0, 2)
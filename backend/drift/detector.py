@@ -1,24 +1,88 @@
 """
 Concept drift detector for physiological signals
 """
+import time
+from collections import deque
 import numpy as np
-from typing import Dict, List, Any, Tuple, Optional
+from typing import Dict, List, Any, Tuple, Optional, Sequence
 from datetime import datetime, timedelta
-from scipy import stats
-import warnings
-warnings.filterwarnings('ignore')
 
+from drift._drift_kernels import (
+    N_BINS, _binned_probs, _chi2_sf_even, _col_stats, _js_from_probs, _ks_2samp_cols,
+    _welch_t_cols, warm_up
+)
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Mean per-feature Jensen-Shannon divergence (nats) treated as drift
+JS_DRIFT_THRESHOLD = 0.05
+
+# Bin positions within each feature's reference range for the JS histograms
+_BIN_STEPS = np.linspace(0.0, 1.0, N_BINS + 1)
+
+# Statistical p-values above this multiple of the threshold end the 'auto'
+# cascade without running the slower detectors
+CLEAR_P_VALUE_FACTOR = 10
+
+# Detection results kept per patient
+HISTORY_LENGTH = 100
+
+# int8 codes for quantized feature storage: -127..127 span each feature's
+# range and -128 marks a missing (NaN) value
+_QUANT_LEVELS = 254
+_QUANT_NAN = -128
+
+# Range-valued category patterns, in the column order of the bound
+# matrices, with the feature column each comes from and whether it is
+# that column's standard deviation (otherwise its mean)
+PATTERN_METRICS = ('heart_rate_mean', 'heart_rate_std', 'activity_level')
+_PATTERN_COLUMNS = np.array([7, 7, 8])
+_PATTERN_IS_STD = np.array([False, True, False])
+
+# Compile the kernels at import so the first detection does not pay for it
+warm_up()
+
+def _iso_timestamp(ts_ns: int) -> str:
+    """Format an epoch-nanosecond timestamp as a local ISO 8601 string"""
+    return datetime.fromtimestamp(ts_ns / 1e9).isoformat()
+
+def _with_iso_timestamp(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a history entry with its ts_ns replaced by an ISO timestamp"""
+    formatted = {key: value for key, value in entry.items() if key != 'ts_ns'}
+    formatted['timestamp'] = _iso_timestamp(entry['ts_ns'])
+    return formatted
+
 class DriftDetector:
     """Detects concept drift in physiological signals"""
     
-    def __init__(self, window_size: int = 100, threshold: float = 0.05):
+    def __init__(self, window_size: int = 100, threshold: float = 0.05,
+                 feature_ranges: Optional[Sequence[Tuple[float, float]]] = None):
+        """
+        Args:
+            window_size: Samples in each of the reference and recent windows
+            threshold: p-value below which the statistical test flags drift
+            feature_ranges: Optional (min, max) per feature column. When
+                given, windows are stored as int8 codes over these ranges
+                (a quarter of the float32 footprint, for fleet-scale
+                storage) and dequantized once per detection. Values outside
+                a range are clipped to it. Each max must exceed its min.
+        """
         self.window_size = window_size
         self.threshold = threshold
         
+        # Affine int8 quantization parameters (None keeps float32 storage)
+        self._quant_lo = None
+        self._quant_scale = None
+        if feature_ranges is not None:
+            ranges = np.asarray(feature_ranges, dtype=np.float32)
+            if ranges.ndim != 2 or ranges.shape[1] != 2:
+                raise ValueError("feature_ranges must be a sequence of (min, max) pairs")
+            if not np.all(ranges[:, 1] > ranges[:, 0]):
+                raise ValueError("each feature range must have max > min")
+            self._quant_lo = ranges[:, 0]
+            self._quant_scale = (ranges[:, 1] - ranges[:, 0]) / _QUANT_LEVELS
+        
         # Store patient-specific data streams
         self.patient_data = {}
         
@@ -52,6 +116,21 @@ class DriftDetector:
             }
         }
         
+        # Category ranges as (categories, metrics) bound matrices so a
+        # metric vector can be checked against them with a few ufuncs
+        self._cat_names = list(self.user_categories)
+        self._cat_index = {name: i for i, name in enumerate(self._cat_names)}
+        self._cat_lo = np.array([
+            [self.user_categories[name][metric][0] for metric in PATTERN_METRICS]
+            for name in self._cat_names
+        ], dtype=np.float64)
+        self._cat_hi = np.array([
+            [self.user_categories[name][metric][1] for metric in PATTERN_METRICS]
+            for name in self._cat_names
+        ], dtype=np.float64)
+        self._cat_inv_lo = 1.0 / self._cat_lo
+        self._cat_inv_hi = 1.0 / self._cat_hi
+        
         # Initialize detection history
         self.detection_history = {}
         
@@ -80,45 +159,30 @@ class DriftDetector:
             self._update_patient_data(patient_id, features, prediction)
             
             # Check if enough data for detection
-            if len(self.patient_data[patient_id]['features']) < self.window_size:
+            patient = self.patient_data[patient_id]
+            if patient['count'] < self.window_size:
                 return {
                     'drift_detected': False,
                     'confidence': 0.0,
                     'reason': 'Insufficient data',
-                    'data_points': len(self.patient_data[patient_id]['features'])
+                    'data_points': patient['count']
                 }
             
+            # One snapshot shared by every detector: the last window_size
+            # samples and the (up to window_size) samples before them. The
+            # mirrored ring makes both zero-copy views
+            window = self._feature_window(patient, self.window_size * 2)
+            reference = window[:-self.window_size]
+            recent = window[-self.window_size:]
+            
             # Select detection method
             if method == 'auto':
-                detection_results = []
-                for method_name, detector in self.detection_methods.items():
-                    result = detector(patient_id)
-                    detection_results.append(result)
-                
-                # Combine results
-                final_result = self._combine_detection_results(detection_results)
+                final_result = self._cascade_detection(patient, reference, recent)
             else:
-                if method in self.detection_methods:
-                    final_result = self.detection_methods[method](patient_id)
-                else:
-                    final_result = self._statistical_test(patient_id)
+                detector = self.detection_methods.get(method, self._statistical_test)
+                final_result = detector(patient, reference, recent)
             
-            # Update detection history
-            self._update_detection_history(patient_id, final_result)
-            
-            # Determine drift type if detected
-            if final_result['drift_detected']:
-                drift_type = self._determine_drift_type(patient_id)
-                final_result['drift_type'] = drift_type
-                
-                logger.info(
-                    f"Drift detected for patient {patient_id}: "
-                    f"{drift_type} (confidence: {final_result['confidence']:.3f})"
-                )
-            else:
-                final_result['drift_type'] = 'none'
-            
-            return final_result
+            return self._finish_detection(patient_id, patient, recent, final_result)
             
         except Exception as e:
             logger.error(f"Drift detection failed for patient {patient_id}: {e}")
@@ -128,12 +192,223 @@ class DriftDetector:
                 'error': str(e)
             }
     
+    def detect_drift_batch(self, patient_ids: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Run 'auto' detection over the current windows of many patients
+        
+        Meant for fleet-wide scans, so no new sample is added. Patients with
+        full reference and recent windows are stacked column-wise into one
+        (2 * window_size, patients * features) array, so the KS, Welch and
+        JS kernels each run once across every patient's columns. The
+        remaining cascade stages run per patient. Results are recorded in
+        the detection history just like detect_drift's.
+        
+        Args:
+            patient_ids: Patients to scan (defaults to every known patient)
+            
+        Returns:
+            Drift detection results keyed by patient id
+        """
+        if patient_ids is None:
+            patient_ids = list(self.patient_data)
+        
+        try:
+            results = {}
+            groups = {}
+            for patient_id in patient_ids:
+                patient = self.patient_data.get(patient_id)
+                count = patient['count'] if patient is not None else 0
+                if count < self.window_size:
+                    results[patient_id] = {
+                        'drift_detected': False,
+                        'confidence': 0.0,
+                        'reason': 'Insufficient data',
+                        'data_points': count
+                    }
+                elif count < self.window_size * 2:
+                    # Too short for the window tests; the cascade settles it alone
+                    window = self._feature_window(patient, self.window_size * 2)
+                    reference = window[:-self.window_size]
+                    recent = window[-self.window_size:]
+                    result = self._cascade_detection(patient, reference, recent)
+                    results[patient_id] = self._finish_detection(patient_id, patient, recent, result)
+                else:
+                    # Stack only patients whose feature vectors have the same length
+                    n_features = patient['features'].shape[1]
+                    groups.setdefault(n_features, []).append(patient_id)
+            
+            for group in groups.values():
+                results.update(self._detect_group(group))
+            
+            return {patient_id: results[patient_id] for patient_id in patient_ids}
+            
+        except Exception as e:
+            logger.error(f"Batch drift detection failed: {e}")
+            return {
+                patient_id: {'drift_detected': False, 'confidence': 0.0, 'error': str(e)}
+                for patient_id in patient_ids
+            }
+    
+    def _detect_group(self, patient_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Batched cascade for patients with full windows of equal width"""
+        w = self.window_size
+        patients = [self.patient_data[patient_id] for patient_id in patient_ids]
+        windows = [self._feature_window(patient, w * 2) for patient in patients]
+        
+        n_patients = len(windows)
+        n_features = windows[0].shape[1]
+        stack = np.empty((w * 2, n_patients, n_features), dtype=np.float32)
+        for i, window in enumerate(windows):
+            stack[:, i] = window
+        columns = stack.reshape(w * 2, n_patients * n_features)
+        
+        # Statistical test for every patient, then the distribution test for
+        # those whose p-value does not already settle the cascade
+        p_values = np.concatenate((
+            _ks_2samp_cols(columns[:w], columns[w:]).reshape(n_patients, n_features),
+            _welch_t_cols(columns[:w], columns[w:]).reshape(n_patients, n_features)
+        ), axis=1)
+        statistical = [self._fisher_result(row[~np.isnan(row)]) for row in p_values]
+        
+        unsettled = [
+            i for i, result in enumerate(statistical)
+            if result.get('p_value', 0.0) <= CLEAR_P_VALUE_FACTOR * self.threshold
+        ]
+        distribution = {}
+        if unsettled:
+            # Reference bins are reused where cached and built in one stacked
+            # call for the rest
+            stale = [i for i in unsettled if not self._reference_bins_current(patients[i])]
+            if stale:
+                reference = stack[:w, stale].reshape(w, len(stale) * n_features)
+                edges = self._js_edges(reference)
+                ref_probs = _binned_probs(reference, edges)
+                for j, i in enumerate(stale):
+                    cols = slice(j * n_features, (j + 1) * n_features)
+                    self._store_reference_bins(patients[i], edges[cols], ref_probs[cols])
+            
+            cached = [patients[i]['statistics']['distribution'] for i in unsettled]
+            edges = np.concatenate([entry['edges'] for entry in cached])
+            ref_probs = np.concatenate([entry['probs'] for entry in cached])
+            recent = stack[w:, unsettled].reshape(w, len(unsettled) * n_features)
+            js_divergences = _js_from_probs(
+                ref_probs, _binned_probs(recent, edges)
+            ).reshape(len(unsettled), n_features)
+            for i, row in zip(unsettled, js_divergences):
+                distribution[i] = self._distribution_result(row)
+        
+        results = {}
+        for i, (patient_id, patient, window) in enumerate(zip(patient_ids, patients, windows)):
+            reference = window[:w]
+            recent = window[w:]
+            result = self._cascade_detection(
+                patient, reference, recent,
+                statistical=statistical[i], distribution=distribution.get(i)
+            )
+            results[patient_id] = self._finish_detection(patient_id, patient, recent, result)
+        return results
+    
+    def _finish_detection(self, patient_id: str, patient: Dict[str, Any],
+                          recent: np.ndarray, final_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Record a detection result and label the drift type"""
+        # Update detection history
+        self._update_detection_history(patient_id, final_result)
+        
+        # Determine drift type if detected
+        if final_result['drift_detected']:
+            drift_type = self._determine_drift_type(patient, recent)
+            final_result['drift_type'] = drift_type
+            
+            logger.info(
+                f"Drift detected for patient {patient_id}: "
+                f"{drift_type} (confidence: {final_result['confidence']:.3f})"
+            )
+        else:
+            final_result['drift_type'] = 'none'
+        
+        return final_result
+    
+    def _cascade_detection(self, patient: Dict[str, Any], reference: np.ndarray,
+                           recent: np.ndarray,
+                           statistical: Optional[Dict[str, Any]] = None,
+                           distribution: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Run the detectors cheapest-first and stop once the outcome is settled
+        
+        A statistical p-value far above the threshold ends the cascade with
+        no drift. Otherwise the distribution and custom-pattern tests run.
+        Clustering (the slowest) only runs when two of those three fired:
+        consensus needs a majority of all four detectors, so with fewer
+        votes clustering cannot change the outcome. When it is skipped the
+        stored cluster centers are still advanced by one Lloyd step, so
+        the next clustering vote compares against the recent window.
+        Statistical and distribution results already computed in a batch
+        can be passed in.
+        
+        Only the detectors that ran are combined, so the reported
+        confidence and methods_used cover those detectors alone.
+        """
+        if statistical is None:
+            statistical = self._statistical_test(patient, reference, recent)
+        results = [statistical]
+        if statistical.get('p_value', 0.0) > CLEAR_P_VALUE_FACTOR * self.threshold:
+            self._refresh_cluster_centers(patient, recent)
+            return self._combine_detection_results(results)
+        
+        if distribution is None:
+            distribution = self._distribution_change(patient, reference, recent)
+        results.append(distribution)
+        results.append(self._custom_pattern_detection(patient, reference, recent))
+        
+        if sum(bool(result['drift_detected']) for result in results) >= 2:
+            results.append(self._cluster_change(patient, reference, recent))
+        else:
+            self._refresh_cluster_centers(patient, recent)
+        
+        return self._combine_detection_results(results)
+    
+    def _refresh_cluster_centers(self, patient: Dict[str, Any], recent: np.ndarray):
+        """
+        Advance the stored cluster centers by one Lloyd step on recent
+        
+        Each center moves to the mean of the rows nearest to it (a center
+        with no rows stays put), which tracks the slowly moving window for
+        a fraction of a KMeans fit.
+        """
+        centers = patient['statistics'].get('cluster_centers')
+        if centers is None or patient['count'] < 50:
+            return
+        
+        rows = recent[~np.isnan(recent).any(axis=1)].astype(np.float64)
+        if len(rows) == 0:
+            return
+        nearest = np.argmin(
+            ((rows[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2), axis=1
+        )
+        refreshed = centers.copy()
+        for i in range(len(centers)):
+            members = rows[nearest == i]
+            if len(members):
+                refreshed[i] = members.mean(axis=0)
+        patient['statistics']['cluster_centers'] = refreshed
+    
     def _initialize_patient(self, patient_id: str):
-        """Initialize data structures for a new patient"""
+        """Initialize data structures for a new patient
+        
+        Observations live in ring buffers holding the last 2 * window_size
+        samples. Each buffer is mirrored (every row is written at slot and
+        slot + capacity) so any recent window is a contiguous view; the
+        feature buffer is allocated on the first observation, once the
+        feature count is known.
+        """
+        capacity = 2 * self.window_size
         self.patient_data[patient_id] = {
-            'features': [],
-            'predictions': [],
-            'timestamps': [],
+            'capacity': capacity,
+            'head': 0,
+            'count': 0,
+            'features': None,
+            'predictions': np.empty(2 * capacity, dtype=np.int16),
+            'timestamps': np.empty(2 * capacity, dtype=np.int64),
             'statistics': {
                 'mean': None,
                 'std': None,
@@ -143,7 +418,7 @@ class DriftDetector:
             'category_history': []
         }
         
-        self.detection_history[patient_id] = []
+        self.detection_history[patient_id] = deque(maxlen=HISTORY_LENGTH)
         
         logger.info(f"Initialized drift detection for patient {patient_id}")
     
@@ -151,50 +426,79 @@ class DriftDetector:
                             prediction: int):
         """Update patient data stream with new observation"""
         patient = self.patient_data[patient_id]
-        
-        patient['features'].append(features)
-        patient['predictions'].append(prediction)
-        patient['timestamps'].append(datetime.now())
-        
-        # Keep only recent data
-        if len(patient['features']) > self.window_size * 2:
-            patient['features'] = patient['features'][-self.window_size:]
-            patient['predictions'] = patient['predictions'][-self.window_size:]
-            patient['timestamps'] = patient['timestamps'][-self.window_size:]
+        capacity = patient['capacity']
+        
+        # Packed float32 rows: half the memory of float64 and no boxed floats
+        # (or int8 codes when quantizing)
+        features = np.asarray(features, dtype=np.float32)
+        if patient['features'] is None:
+            dtype = np.float32 if self._quant_scale is None else np.int8
+            patient['features'] = np.empty((2 * capacity, features.size), dtype=dtype)
+        if self._quant_scale is not None:
+            features = self._quantize(features)
+        
+        # Write the sample and its mirror; the oldest sample is overwritten
+        slot = patient['head'] % capacity
+        timestamp = time.time_ns()
+        for idx in (slot, slot + capacity):
+            patient['features'][idx] = features
+            patient['predictions'][idx] = prediction
+            patient['timestamps'][idx] = timestamp
+        
+        patient['head'] += 1
+        patient['count'] = min(patient['count'] + 1, capacity)
+    
+    def _recent(self, patient: Dict[str, Any], n: int, key: str = 'features') -> np.ndarray:
+        """Contiguous view of the last min(n, count) samples, oldest first"""
+        n = min(n, patient['count'])
+        end = patient['head'] % patient['capacity'] + patient['capacity']
+        return patient[key][end - n:end]
+    
+    def _feature_window(self, patient: Dict[str, Any], n: int) -> np.ndarray:
+        """Last min(n, count) feature rows as float32 (a view unless quantized)"""
+        window = self._recent(patient, n)
+        if self._quant_scale is None:
+            return window
+        return self._dequantize(window)
+    
+    def _quantize(self, features: np.ndarray) -> np.ndarray:
+        """float32 feature values to int8 codes, clipping to the configured ranges"""
+        codes = np.rint((features - self._quant_lo) / self._quant_scale) - _QUANT_LEVELS // 2
+        codes = np.clip(codes, -(_QUANT_LEVELS // 2), _QUANT_LEVELS // 2)
+        return np.where(np.isnan(codes), _QUANT_NAN, codes).astype(np.int8)
+    
+    def _dequantize(self, codes: np.ndarray) -> np.ndarray:
+        """int8 codes back to float32 feature values (NaN for missing values)"""
+        values = (codes.astype(np.float32) + _QUANT_LEVELS // 2) * self._quant_scale + self._quant_lo
+        values[codes == _QUANT_NAN] = np.nan
+        return values
     
-    def _statistical_test(self, patient_id: str) -> Dict[str, Any]:
+    def _statistical_test(self, patient: Dict[str, Any], reference: np.ndarray,
+                          recent: np.ndarray) -> Dict[str, Any]:
         """Statistical test for concept drift"""
-        patient = self.patient_data[patient_id]
-        features = np.array(patient['features'])
-        
-        if len(features) < self.window_size * 2:
+        if len(reference) < self.window_size:
             return {'drift_detected': False, 'confidence': 0.0}
         
-        # Split into reference and recent windows
-        reference = features[:self.window_size]
-        recent = features[-self.window_size:]
-        
-        # Perform statistical tests on each feature
-        p_values = []
-        
-        for i in range(features.shape[1]):
-            # Kolmogorov-Smirnov test for distribution change
-            if len(np.unique(recent[:, i])) > 1 and len(np.unique(reference[:, i])) > 1:
-                ks_stat, ks_p = stats.ks_2samp(reference[:, i], recent[:, i])
-                p_values.append(ks_p)
-            
-            # T-test for mean change (for normally distributed features)
-            t_stat, t_p = stats.ttest_ind(reference[:, i], recent[:, i], 
-                                         equal_var=False, nan_policy='omit')
-            if not np.isnan(t_p):
-                p_values.append(t_p)
-        
-        if not p_values:
+        # Kolmogorov-Smirnov test for distribution change and Welch's t-test
+        # for mean change, on every feature at once; NaN marks a skipped test
+        p_values = np.concatenate((
+            _ks_2samp_cols(reference, recent),
+            _welch_t_cols(reference, recent)
+        ))
+        return self._fisher_result(p_values[~np.isnan(p_values)])
+    
+    def _fisher_result(self, p_values: np.ndarray) -> Dict[str, Any]:
+        """Statistical test result from the non-NaN per-feature p-values"""
+        if not p_values.size:
             return {'drift_detected': False, 'confidence': 0.0}
         
-        # Combine p-values using Fisher's method
-        chi_squared = -2 * np.sum(np.log(p_values))
-        combined_p = stats.chi2.sf(chi_squared, 2 * len(p_values))
+        # Combine p-values using Fisher's method (chi-squared with 2k dof);
+        # a zero p-value makes the statistic infinite, so skip the log of it
+        if (p_values == 0.0).any():
+            combined_p = 0.0
+        else:
+            chi_squared = -2.0 * np.log(p_values).sum()
+            combined_p = _chi2_sf_even(chi_squared, len(p_values))
         
         drift_detected = combined_p < self.threshold
         confidence = 1 - combined_p
@@ -207,73 +511,100 @@ class DriftDetector:
             'tested_features': len(p_values)
         }
     
-    def _distribution_change(self, patient_id: str) -> Dict[str, Any]:
-        """Detect distribution changes using KL divergence"""
-        patient = self.patient_data[patient_id]
-        features = np.array(patient['features'])
-        
-        if len(features) < self.window_size * 2:
+    def _distribution_change(self, patient: Dict[str, Any], reference: np.ndarray,
+                             recent: np.ndarray) -> Dict[str, Any]:
+        """Detect distribution changes using Jensen-Shannon divergence"""
+        if len(reference) < self.window_size:
             return {'drift_detected': False, 'confidence': 0.0}
         
-        # Split into reference and recent windows
-        reference = features[:self.window_size]
-        recent = features[-self.window_size:]
-        
-        # Calculate KL divergence for each feature
-        kl_divergences = []
+        # Jensen-Shannon divergence for each feature; only the recent
+        # window is binned unless the reference has moved
+        if not self._reference_bins_current(patient):
+            edges = self._js_edges(reference)
+            self._store_reference_bins(patient, edges, _binned_probs(reference, edges))
+        cached = patient['statistics']['distribution']
+        js_divergences = _js_from_probs(cached['probs'], _binned_probs(recent, cached['edges']))
+        return self._distribution_result(js_divergences)
+    
+    def _reference_bins_current(self, patient: Dict[str, Any]) -> bool:
+        """
+        Whether the cached reference histogram matches the current window
         
-        for i in range(features.shape[1]):
-            # Create histograms
-            ref_hist, bin_edges = np.histogram(reference[:, i], bins=10, density=True)
-            rec_hist, _ = np.histogram(recent[:, i], bins=bin_edges, density=True)
-            
-            # Add small epsilon to avoid zero probabilities
-            ref_hist = ref_hist + 1e-10
-            rec_hist = rec_hist + 1e-10
-            
-            # Normalize
-            ref_hist = ref_hist / np.sum(ref_hist)
-            rec_hist = rec_hist / np.sum(rec_hist)
-            
-            # Calculate KL divergence
-            kl_div = np.sum(ref_hist * np.log(ref_hist / rec_hist))
-            kl_divergences.append(kl_div)
+        The reference window slides with every new sample, so the cache is
+        keyed on the ring head and serves repeated detections (such as
+        batch scans) between samples.
+        """
+        cached = patient['statistics']['distribution']
+        return cached is not None and cached['head'] == patient['head']
+    
+    def _store_reference_bins(self, patient: Dict[str, Any], edges: np.ndarray,
+                              probs: np.ndarray):
+        """Cache reference histogram edges and bin probabilities for the current window"""
+        patient['statistics']['distribution'] = {
+            'head': patient['head'],
+            'edges': edges,
+            'probs': probs
+        }
+    
+    def _js_edges(self, reference: np.ndarray) -> np.ndarray:
+        """
+        Per-column histogram edges: N_BINS equal-width bins spanning the
+        reference range (as np.histogram would pick them)
+        """
+        # fmin/fmax skip NaNs without nanmin's warning on all-NaN columns
+        lo = np.fmin.reduce(reference, axis=0)
+        hi = np.fmax.reduce(reference, axis=0)
+        flat = lo == hi
+        lo = np.where(flat, lo - 0.5, lo)
+        hi = np.where(flat, hi + 0.5, hi)
+        return lo[:, None] + (hi - lo)[:, None] * _BIN_STEPS
+    
+    def _distribution_result(self, js_divergences: np.ndarray) -> Dict[str, Any]:
+        """Distribution test result from the per-feature JS divergences"""
+        # All-NaN reference columns have no edges and yield NaN; skip them
+        js_divergences = js_divergences[~np.isnan(js_divergences)]
+        if not js_divergences.size:
+            return {'drift_detected': False, 'confidence': 0.0}
         
-        avg_kl = np.mean(kl_divergences)
+        avg_js = float(np.mean(js_divergences))
         
-        # Determine drift based on threshold
-        drift_detected = avg_kl > 0.5  # Threshold for KL divergence
-        confidence = min(avg_kl / 2.0, 1.0)  # Normalize to [0, 1]
+        # Determine drift based on threshold; JS is bounded by log 2
+        drift_detected = avg_js > JS_DRIFT_THRESHOLD
+        confidence = avg_js / np.log(2)
         
         return {
             'drift_detected': drift_detected,
             'confidence': confidence,
             'method': 'distribution',
-            'avg_kl_divergence': avg_kl,
-            'features_analyzed': len(kl_divergences)
+            'avg_js_divergence': avg_js,
+            'features_analyzed': len(js_divergences)
         }
     
-    def _cluster_change(self, patient_id: str) -> Dict[str, Any]:
+    def _cluster_change(self, patient: Dict[str, Any], reference: np.ndarray,
+                        recent: np.ndarray) -> Dict[str, Any]:
         """Detect changes in clustering patterns"""
         from sklearn.cluster import KMeans
-        from sklearn.metrics import silhouette_score
-        
-        patient = self.patient_data[patient_id]
-        features = np.array(patient['features'])
         
-        if len(features) < 50:  # Need sufficient data for clustering
+        if patient['count'] < 50:  # Need sufficient data for clustering
             return {'drift_detected': False, 'confidence': 0.0}
         
-        # Cluster recent data
-        kmeans = KMeans(n_clusters=3, random_state=42)
-        recent_labels = kmeans.fit_predict(features[-self.window_size:])
+        # Cluster recent data, warm-starting from the previous centers: the
+        # window only moves by a few samples between calls, so Lloyd
+        # converges in a couple of iterations and cluster i keeps its identity
+        old_centers = patient['statistics'].get('cluster_centers')
+        if old_centers is None:
+            kmeans = KMeans(n_clusters=3, random_state=42)
+        else:
+            kmeans = KMeans(n_clusters=3, init=old_centers, n_init=1, max_iter=5,
+                            random_state=42)
+        kmeans.fit(recent)
         
-        # Calculate clustering metrics
-        silhouette = silhouette_score(features[-self.window_size:], recent_labels)
+        # Cluster tightness: mean squared distance to the nearest center,
+        # which KMeans already computed (silhouette is O(n^2) per call)
+        tightness = kmeans.inertia_ / len(recent)
         
         # Compare with historical clustering if available
-        if 'cluster_centers' in patient['statistics']:
-            old_centers = patient['statistics']['cluster_centers']
+        if old_centers is not None:
             new_centers = kmeans.cluster_centers_
             
             # Calculate center movement
@@ -298,43 +629,34 @@ class DriftDetector:
             'drift_detected': drift_detected,
             'confidence': confidence,
             'method': 'clustering',
-            'silhouette_score': silhouette,
+            'cluster_tightness': tightness,
             'center_movement': avg_movement
         }
     
-    def _custom_pattern_detection(self, patient_id: str) -> Dict[str, Any]:
+    def _custom_pattern_detection(self, patient: Dict[str, Any], reference: np.ndarray,
+                                  recent: np.ndarray) -> Dict[str, Any]:
         """Custom pattern detection for specific user categories"""
-        patient = self.patient_data[patient_id]
-        features = np.array(patient['features'])
-        
-        if len(features) < 10:
+        if patient['count'] < 10:
             return {'drift_detected': False, 'confidence': 0.0}
         
-        # Extract physiological patterns
-        recent_features = features[-self.window_size:]
-        
-        # Calculate pattern metrics
-        pattern_metrics = self._extract_pattern_metrics(recent_features)
+        # Calculate physiological pattern metrics
+        values = self._pattern_vector(recent)
         
         # Compare with current category
         current_category = patient['current_category']
-        category_patterns = self.user_categories.get(current_category, {})
-        
-        # Calculate deviation from expected patterns
-        deviations = []
-        
-        for metric, value in pattern_metrics.items():
-            if metric in category_patterns and isinstance(category_patterns[metric], tuple):
-                expected_min, expected_max = category_patterns[metric]
-                if value < expected_min:
-                    deviation = (expected_min - value) / expected_min
-                elif value > expected_max:
-                    deviation = (value - expected_max) / expected_max
-                else:
-                    deviation = 0
-                deviations.append(deviation)
-        
-        avg_deviation = np.mean(deviations) if deviations else 0
+        row = self._cat_index.get(current_category)
+        
+        # Relative deviation outside the expected range (0 inside it); NaN
+        # marks a metric the feature vector is too short to provide
+        avg_deviation = 0
+        if row is not None:
+            deviations = np.maximum(0.0, np.maximum(
+                (self._cat_lo[row] - values) * self._cat_inv_lo[row],
+                (values - self._cat_hi[row]) * self._cat_inv_hi[row]
+            ))
+            deviations = deviations[~np.isnan(deviations)]
+            if deviations.size:
+                avg_deviation = float(deviations.mean())
         drift_detected = avg_deviation > 0.3  # 30% deviation threshold
         confidence = min(avg_deviation, 1.0)
         
@@ -346,39 +668,15 @@ class DriftDetector:
             'current_category': current_category
         }
     
-    def _extract_pattern_metrics(self, features: np.ndarray) -> Dict[str, float]:
-        """Extract pattern metrics from feature data"""
-        # Assuming features include: age, sex, cp, trestbps, chol, fbs, restecg,
-        # thalach, exang, oldpeak, slope, ca, thal
-        
-        metrics = {}
-        
+    def _pattern_vector(self, features: np.ndarray) -> np.ndarray:
+        """PATTERN_METRICS values as a fixed-length vector (NaN if unavailable)"""
+        values = np.full(len(PATTERN_METRICS), np.nan)
         if len(features) > 0:
-            # Heart rate patterns (feature index 7 - thalach)
-            if features.shape[1] > 7:
-                heart_rates = features[:, 7]
-                metrics['heart_rate_mean'] = np.mean(heart_rates)
-                metrics['heart_rate_std'] = np.std(heart_rates)
-                metrics['heart_rate_var'] = np.var(heart_rates)
-            
-            # Blood pressure patterns (feature index 3 - trestbps)
-            if features.shape[1] > 3:
-                bp = features[:, 3]
-                metrics['bp_mean'] = np.mean(bp)
-                metrics['bp_variability'] = np.std(bp) / np.mean(bp) if np.mean(bp) > 0 else 0
-            
-            # Cholesterol patterns (feature index 4 - chol)
-            if features.shape[1] > 4:
-                chol = features[:, 4]
-                metrics['chol_mean'] = np.mean(chol)
-            
-            # Activity patterns (feature index 8 - exang)
-            if features.shape[1] > 8:
-                activity = features[:, 8]
-                metrics['activity_level'] = np.mean(activity)
-                metrics['activity_var'] = np.var(activity)
-        
-        return metrics
+            mean, std = _col_stats(features)
+            present = _PATTERN_COLUMNS < features.shape[1]
+            columns = _PATTERN_COLUMNS[present]
+            values[present] = np.where(_PATTERN_IS_STD[present], std[columns], mean[columns])
+        return values
     
     def _combine_detection_results(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Combine results from multiple detection methods"""
@@ -412,35 +710,23 @@ class DriftDetector:
             'method': 'ensemble'
         }
     
-    def _determine_drift_type(self, patient_id: str) -> str:
+    def _determine_drift_type(self, patient: Dict[str, Any], recent: np.ndarray) -> str:
         """Determine the type of drift based on patterns"""
-        patient = self.patient_data[patient_id]
-        features = np.array(patient['features'][-self.window_size:])
-        
-        # Extract recent patterns
-        patterns = self._extract_pattern_metrics(features)
-        
-        # Compare with each category
+        # Fraction of the available metrics inside each category's ranges;
+        # argmax keeps the first category on ties, as the strict > scan did
+        values = self._pattern_vector(recent)
+        present = ~np.isnan(values)
         best_match = 'typical'
         best_score = 0
         
-        for category, category_patterns in self.user_categories.items():
-            score = 0
-            matches = 0
-            
-            for pattern_key, pattern_value in patterns.items():
-                if pattern_key in category_patterns:
-                    if isinstance(category_patterns[pattern_key], tuple):
-                        min_val, max_val = category_patterns[pattern_key]
-                        if min_val <= pattern_value <= max_val:
-                            score += 1
-                    matches += 1
-            
-            if matches > 0:
-                category_score = score / matches
-                if category_score > best_score:
-                    best_score = category_score
-                    best_match = category
+        if present.any():
+            in_range = (values[present] >= self._cat_lo[:, present]) & \
+                       (values[present] <= self._cat_hi[:, present])
+            scores = in_range.mean(axis=1)
+            best = int(scores.argmax())
+            if scores[best] > 0:
+                best_score = float(scores[best])
+                best_match = self._cat_names[best]
         
         # Only update if significantly different from current
         current_category = patient['current_category']
@@ -448,7 +734,7 @@ class DriftDetector:
             patient['current_category'] = best_match
             patient['category_history'].append({
                 'category': best_match,
-                'timestamp': datetime.now().isoformat(),
+                'ts_ns': time.time_ns(),
                 'confidence': best_score
             })
         
@@ -457,22 +743,30 @@ class DriftDetector:
     def _update_detection_history(self, patient_id: str, result: Dict[str, Any]):
         """Update detection history for a patient"""
         if patient_id not in self.detection_history:
-            self.detection_history[patient_id] = []
+            self.detection_history[patient_id] = deque(maxlen=HISTORY_LENGTH)
         
+        # Timestamps are kept as integers and only formatted when read
         history_entry = {
             **result,
-            'timestamp': datetime.now().isoformat()
+            'ts_ns': time.time_ns()
         }
         
+        # The bounded deque drops the oldest entry once full
         self.detection_history[patient_id].append(history_entry)
-        
-        # Keep only recent history
-        if len(self.detection_history[patient_id]) > 100:
-            self.detection_history[patient_id] = self.detection_history[patient_id][-100:]
     
     def get_drift_history(self, patient_id: str) -> List[Dict[str, Any]]:
         """Get drift detection history for a patient"""
-        return self.detection_history.get(patient_id, [])
+        return [
+            _with_iso_timestamp(entry)
+            for entry in self.detection_history.get(patient_id, [])
+        ]
+    
+    def get_latest_drift(self, patient_id: str) -> Optional[Dict[str, Any]]:
+        """Get the most recent drift detection result for a patient, if any"""
+        history = self.detection_history.get(patient_id)
+        if not history:
+            return None
+        return _with_iso_timestamp(history[-1])
     
     def get_patient_category(self, patient_id: str) -> Dict[str, Any]:
         """Get current category and history for a patient"""
@@ -483,10 +777,12 @@ class DriftDetector:
         
         return {
             'current_category': patient['current_category'],
-            'category_history': patient['category_history'],
-            'data_points': len(patient['features']),
-            'last_updated': patient['timestamps'][-1].isoformat() 
-                if patient['timestamps'] else None
+            'category_history': [
+                _with_iso_timestamp(entry) for entry in patient['category_history']
+            ],
+            'data_points': patient['count'],
+            'last_updated': _iso_timestamp(self._recent(patient, 1, 'timestamps')[0])
+                if patient['count'] else None
         }
     
     def is_ready(self) -> bool:
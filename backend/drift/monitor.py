@@ -3,11 +3,14 @@ Continuous monitor for concept drift and model performance
 """
 import time
 import threading
-import schedule
-from typing import Dict, List, Any, Callable
+import queue
+import psutil
+from collections import deque
+from typing import Dict, List, Any, Callable, Optional, Tuple
 from datetime import datetime, timedelta
 import json
 import os
+import pickle
 
 from utils.logger import get_logger
 from drift.detector import DriftDetector
@@ -15,6 +18,15 @@ from services.evaluation_service import EvaluationService
 
 logger = get_logger(__name__)
 
+# Alerts are appended to a JSON Lines file, one alert per line. Once it
+# holds twice MAX_SAVED_ALERTS it is rewritten to the newest
+# MAX_SAVED_ALERTS, so the rewrite cost is spread over many appends
+ALERT_FILE = 'alerts.jsonl'
+MAX_SAVED_ALERTS = 1000
+
+# Most alerts the background writer appends with one write() call
+ALERT_WRITE_BATCH = 64
+
 class DriftMonitor:
     """Continuous monitor for concept drift and model health"""
     
@@ -26,7 +38,10 @@ class DriftMonitor:
         # Monitoring state
         self.is_monitoring = False
         self.monitor_thread = None
+        self._stop_event = threading.Event()
         self.callbacks = []
+        # Immutable snapshot read by _trigger_alert; rebuilt on registration
+        self._callbacks_tuple = ()
         
         # Alert thresholds
         self.alert_thresholds = {
@@ -38,14 +53,32 @@ class DriftMonitor:
         # Monitoring history
         self.monitoring_history = {
             'drift_events': [],
-            'performance_alerts': [],
+            'performance_alerts': deque(),
             'model_swaps': [],
-            'system_checks': []
+            'system_checks': deque()
         }
         
+        # Set whenever monitoring_history changes; the periodic state save
+        # is skipped while it is clear
+        self._state_dirty = False
+        
+        # Latest drift event per patient, keyed by the detector history entry
+        # it came from, so unchanged histories are not re-read every tick
+        self._last_drift_cache: Dict[str, Tuple[Dict[str, Any], Optional[Dict[str, Any]]]] = {}
+        
         # Initialize monitoring directory
         self.monitor_dir = 'monitoring/'
         os.makedirs(self.monitor_dir, exist_ok=True)
+        self.alert_file = os.path.join(self.monitor_dir, ALERT_FILE)
+        self._saved_alerts = self._count_saved_alerts()
+        
+        # Alerts are written off the monitoring thread, in batches; the lock
+        # serializes the writer with the cleanup rewrite. The writer starts
+        # with the first queued alert and stop_monitoring ends it
+        self._alert_queue = queue.Queue()
+        self._alert_file_lock = threading.Lock()
+        self._alert_writer = None
+        self._alert_writer_lock = threading.Lock()
         
         logger.info("DriftMonitor initialized")
     
@@ -56,6 +89,7 @@ class DriftMonitor:
             return
         
         self.is_monitoring = True
+        self._stop_event.clear()
         self.monitor_thread = threading.Thread(
             target=self._monitoring_loop,
             daemon=True
@@ -67,14 +101,26 @@ class DriftMonitor:
     def stop_monitoring(self):
         """Stop continuous monitoring"""
         self.is_monitoring = False
+        self._stop_event.set()
         if self.monitor_thread:
             self.monitor_thread.join(timeout=10)
         
+        # Let the writer flush any queued alerts, then exit
+        self._stop_alert_writer()
+        
         logger.info("Stopped continuous monitoring")
     
     def _monitoring_loop(self):
         """Main monitoring loop"""
-        while self.is_monitoring:
+        # Prime the CPU counter: cpu_percent(interval=None) reports usage
+        # since the previous call, without blocking. psutil keeps that
+        # baseline in module state, not per monitor, so any other
+        # interval=None caller in the process can move it (newer psutil
+        # releases key it by calling thread)
+        psutil.cpu_percent(interval=None)
+        
+        deadline = time.monotonic()
+        while not self._stop_event.is_set():
             try:
                 # Perform monitoring tasks
                 self._check_system_health()
@@ -82,23 +128,28 @@ class DriftMonitor:
                 self._check_model_performance()
                 self._cleanup_old_data()
                 
-                # Save monitoring state periodically
-                if len(self.monitoring_history['system_checks']) % 10 == 0:
+                # Save monitoring state periodically, if it changed
+                if (self._state_dirty and
+                        len(self.monitoring_history['system_checks']) % 10 == 0):
                     self._save_monitoring_state()
                 
             except Exception as e:
                 logger.error(f"Monitoring loop error: {e}")
             
-            # Sleep until next interval
-            time.sleep(self.monitor_interval)
+            # Wait for the next tick on a fixed cadence (ticks missed by an
+            # overlong pass are skipped); stop_monitoring wakes the wait
+            deadline += self.monitor_interval
+            now = time.monotonic()
+            deadline = max(deadline, now)
+            if self._stop_event.wait(deadline - now):
+                break
     
     def _check_system_health(self):
         """Check system health and resources"""
         try:
-            import psutil
-            
-            # Get system metrics
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # Get system metrics; CPU usage covers the time since psutil's
+            # baseline last moved, normally the previous check
+            cpu_percent = psutil.cpu_percent(interval=None)
             memory = psutil.virtual_memory()
             disk = psutil.disk_usage('/')
             
@@ -112,6 +163,8 @@ class DriftMonitor:
                 'status': 'healthy' if cpu_percent < 90 and memory.percent < 90 else 'warning'
             }
             
+            # Routine samples stay in memory only and do not dirty the
+            # persisted state
             self.monitoring_history['system_checks'].append(system_check)
             
             # Trigger alert if system health is poor
@@ -134,17 +187,16 @@ class DriftMonitor:
             
             # Get recent drift events from detector
             recent_drifts = []
-            for patient_id in self.drift_detector.detection_history:
-                history = self.drift_detector.get_drift_history(patient_id)
-                if history:
-                    recent = history[-1]
-                    if recent['drift_detected']:
-                        recent_drifts.append({
-                            'patient_id': patient_id,
-                            'drift_type': recent.get('drift_type', 'unknown'),
-                            'confidence': recent.get('confidence', 0),
-                            'timestamp': recent.get('timestamp')
-                        })
+            for patient_id, history in self.drift_detector.detection_history.items():
+                if not history:
+                    continue
+                latest = history[-1]
+                cached = self._last_drift_cache.get(patient_id)
+                if cached is None or cached[0] is not latest:
+                    cached = (latest, self._latest_drift_event(patient_id))
+                    self._last_drift_cache[patient_id] = cached
+                if cached[1] is not None:
+                    recent_drifts.append(cached[1])
             
             # Analyze drift patterns
             if recent_drifts:
@@ -153,6 +205,18 @@ class DriftMonitor:
         except Exception as e:
             logger.error(f"Prediction analysis failed: {e}")
     
+    def _latest_drift_event(self, patient_id: str) -> Optional[Dict[str, Any]]:
+        """Drift event for a patient's latest detection, or None if it found no drift"""
+        recent = self.drift_detector.get_latest_drift(patient_id)
+        if recent is None or not recent['drift_detected']:
+            return None
+        return {
+            'patient_id': patient_id,
+            'drift_type': recent.get('drift_type', 'unknown'),
+            'confidence': recent.get('confidence', 0),
+            'timestamp': recent.get('timestamp')
+        }
+    
     def _analyze_drift_patterns(self, drifts: List[Dict[str, Any]]):
         """Analyze patterns in detected drifts"""
         try:
@@ -240,25 +304,28 @@ class DriftMonitor:
             cutoff_time = datetime.now() - timedelta(days=30)
             cutoff_str = cutoff_time.isoformat()
             
-            # Clean system checks
-            self.monitoring_history['system_checks'] = [
-                check for check in self.monitoring_history['system_checks']
-                if check['timestamp'] > cutoff_str
-            ]
+            # Entries are appended in time order (ISO timestamps sort as
+            # strings), so only the expired prefix is examined and dropped
+            for key in ('system_checks', 'performance_alerts'):
+                history = self.monitoring_history[key]
+                while history and history[0]['timestamp'] <= cutoff_str:
+                    history.popleft()
+                    if key == 'performance_alerts':
+                        self._state_dirty = True
             
-            # Clean old alert files
-            alert_file = os.path.join(self.monitor_dir, 'alerts.json')
-            if os.path.exists(alert_file):
-                with open(alert_file, 'r') as f:
-                    alerts = json.load(f)
-                
-                recent_alerts = [
-                    alert for alert in alerts
-                    if alert.get('timestamp', '') > cutoff_str
-                ]
-                
-                with open(alert_file, 'w') as f:
-                    json.dump(recent_alerts, f, indent=2)
+            # Clean old alerts from the alert file
+            with self._alert_file_lock:
+                if os.path.exists(self.alert_file):
+                    with open(self.alert_file, 'r') as f:
+                        lines = f.readlines()
+                    
+                    expired = 0
+                    while (expired < len(lines) and
+                           json.loads(lines[expired]).get('timestamp', '') <= cutoff_str):
+                        expired += 1
+                    
+                    if expired:
+                        self._rewrite_alerts(lines[expired:])
             
         except Exception as e:
             logger.error(f"Cleanup failed: {e}")
@@ -271,13 +338,16 @@ class DriftMonitor:
             
             # Add to monitoring history
             self.monitoring_history['performance_alerts'].append(alert_data)
+            self._state_dirty = True
             
             # Call registered callbacks
-            for callback in self.callbacks:
-                try:
-                    callback(alert_data)
-                except Exception as e:
-                    logger.error(f"Alert callback failed: {e}")
+            callbacks = self._callbacks_tuple
+            if callbacks:
+                for callback in callbacks:
+                    try:
+                        callback(alert_data)
+                    except Exception as e:
+                        logger.error(f"Alert callback failed: {e}")
             
             # Log alert
             logger.warning(f"Alert triggered: {alert_data['type']} - {alert_data.get('message', '')}")
@@ -289,40 +359,106 @@ class DriftMonitor:
             logger.error(f"Failed to trigger alert: {e}")
     
     def _save_alert(self, alert: Dict[str, Any]):
-        """Save alert to file"""
+        """Queue alert for the background alert writer"""
         try:
-            alert_file = os.path.join(self.monitor_dir, 'alerts.json')
-            alerts = []
-            
-            if os.path.exists(alert_file):
-                with open(alert_file, 'r') as f:
-                    alerts = json.load(f)
-            
-            alerts.append(alert)
-            
-            # Keep only last 1000 alerts
-            if len(alerts) > 1000:
-                alerts = alerts[-1000:]
-            
-            with open(alert_file, 'w') as f:
-                json.dump(alerts, f, indent=2)
-                
+            # Serialized here so later changes to the dict are not written
+            line = json.dumps(alert) + '\n'
+            with self._alert_writer_lock:
+                if self._alert_writer is None:
+                    self._alert_writer = threading.Thread(
+                        target=self._alert_writer_loop,
+                        daemon=True
+                    )
+                    self._alert_writer.start()
+                self._alert_queue.put(line)
         except Exception as e:
             logger.error(f"Failed to save alert: {e}")
     
+    def _stop_alert_writer(self):
+        """Flush the alert queue and end the writer thread, if it is running"""
+        with self._alert_writer_lock:
+            writer, self._alert_writer = self._alert_writer, None
+            if writer is None:
+                return
+            # None is the stop sentinel; it is queued behind every pending alert
+            self._alert_queue.put(None)
+            writer.join()
+    
+    def _alert_writer_loop(self):
+        """
+        Append queued alerts to the alert file, up to ALERT_WRITE_BATCH per
+        write, until the None sentinel is dequeued
+        """
+        while True:
+            lines = [self._alert_queue.get()]
+            while lines[-1] is not None and len(lines) < ALERT_WRITE_BATCH:
+                try:
+                    lines.append(self._alert_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            stopping = lines[-1] is None
+            if stopping:
+                lines.pop()
+            if lines:
+                try:
+                    self._write_alerts(lines)
+                except Exception as e:
+                    logger.error(f"Failed to save alerts: {e}")
+            if stopping:
+                return
+    
+    def _write_alerts(self, lines: List[str]):
+        """Append JSON lines to the alert file"""
+        with self._alert_file_lock:
+            with open(self.alert_file, 'a') as f:
+                f.write(''.join(lines))
+            self._saved_alerts += len(lines)
+            
+            # Keep only the most recent alerts
+            if self._saved_alerts >= 2 * MAX_SAVED_ALERTS:
+                with open(self.alert_file, 'r') as f:
+                    recent_lines = deque(f, maxlen=MAX_SAVED_ALERTS)
+                self._rewrite_alerts(recent_lines)
+    
+    def _count_saved_alerts(self) -> int:
+        """Number of alerts currently in the alert file"""
+        if not os.path.exists(self.alert_file):
+            return 0
+        with open(self.alert_file, 'rb') as f:
+            return sum(1 for _ in f)
+    
+    def _rewrite_alerts(self, lines):
+        """Atomically replace the alert file with the given JSON lines"""
+        tmp_file = self.alert_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            f.writelines(lines)
+        os.replace(tmp_file, self.alert_file)
+        self._saved_alerts = len(lines)
+    
     def _save_monitoring_state(self):
-        """Save monitoring state to file"""
+        """
+        Save monitoring state to file
+
+        Only alerts and thresholds are persisted; system checks are routine
+        samples that are cheap to regenerate, so the state changes (and is
+        rewritten) only when an alert is raised or expires.
+        """
         try:
-            state_file = os.path.join(self.monitor_dir, 'monitoring_state.json')
+            state_file = os.path.join(self.monitor_dir, 'monitoring_state.pkl')
             state = {
-                'monitoring_history': self.monitoring_history,
+                'performance_alerts': self.monitoring_history['performance_alerts'],
                 'alert_thresholds': self.alert_thresholds,
                 'last_updated': datetime.now().isoformat(),
                 'is_monitoring': self.is_monitoring
             }
             
-            with open(state_file, 'w') as f:
-                json.dump(state, f, indent=2, default=str)
+            # Binary pickle (deques included) with an atomic rename
+            tmp_file = state_file + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, state_file)
+            self._state_dirty = False
                 
         except Exception as e:
             logger.error(f"Failed to save monitoring state: {e}")
@@ -330,6 +466,7 @@ class DriftMonitor:
     def register_callback(self, callback: Callable[[Dict[str, Any]], None]):
         """Register a callback for alerts"""
         self.callbacks.append(callback)
+        self._callbacks_tuple = tuple(self.callbacks)
         logger.info(f"Registered alert callback: {callback.__name__}")
     
     def get_monitoring_status(self) -> Dict[str, Any]:
@@ -349,4 +486,4 @@ class DriftMonitor:
     
     def get_recent_alerts(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get recent alerts"""
-        return self.monitoring_history['performance_alerts'][-limit:]
\ No newline at end of file
+        return list(self.monitoring_history['performance_alerts'])[-limit:]
\ No newline at end of file
@@ -4,14 +4,24 @@ Advanced aggregation strategies for federated learning
 import numpy as np
 import torch
 import torch.nn as nn
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Optional
 from scipy import stats
 import copy
+import functools
 
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Device the flattened (n, D) client matrices are reduced on. Clients
+# usually return CPU state dicts; when a GPU is present, one copy of the
+# stacked matrix turns the robust aggregators' sorts, medians and Gram
+# products into single kernel launches. The strategies are not wrapped in
+# torch.compile: each reduction is already one library kernel (sort,
+# median, matmul) with nothing for Inductor to fuse, and every new model
+# shape would pay seconds of recompilation on a once-per-round path
+AGGREGATION_DEVICE = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+
 class AggregationStrategies:
     """Collection of aggregation strategies for federated learning"""
     
@@ -20,17 +30,8 @@ class AggregationStrategies:
                client_samples: List[int]) -> Dict[str, Any]:
         """Federated Averaging"""
         total_samples = sum(client_samples)
-        avg_weights = {}
-        
-        for i, weights in enumerate(client_weights):
-            weight_factor = client_samples[i] / total_samples
-            
-            for key, value in weights.items():
-                if key not in avg_weights:
-                    avg_weights[key] = torch.zeros_like(value)
-                avg_weights[key] += value * weight_factor
-        
-        return avg_weights
+        factors = [samples / total_samples for samples in client_samples]
+        return AggregationStrategies._weighted_sum(client_weights, factors)
     
     @staticmethod
     def fedprox(client_weights: List[Dict[str, Any]], 
@@ -39,18 +40,19 @@ class AggregationStrategies:
                 mu: float = 0.01) -> Dict[str, Any]:
         """FedProx aggregation with proximal term"""
         total_samples = sum(client_samples)
-        avg_weights = {}
-        
-        for i, weights in enumerate(client_weights):
-            weight_factor = client_samples[i] / total_samples
-            
-            for key, value in weights.items():
-                if key not in avg_weights:
-                    avg_weights[key] = torch.zeros_like(value)
-                
-                # Add proximal term
-                proximal_term = mu * (value - global_weights[key])
-                avg_weights[key] += (value - proximal_term) * weight_factor
+        factors = [samples / total_samples for samples in client_samples]
+        
+        # Each client contributes value - mu * (value - global), that is
+        # (1 - mu) * value + mu * global, so the global term is added once
+        avg_weights = AggregationStrategies._weighted_sum(
+            client_weights, [(1 - mu) * factor for factor in factors]
+        )
+        if avg_weights:
+            torch._foreach_add_(
+                list(avg_weights.values()),
+                [global_weights[key] for key in avg_weights],
+                alpha=mu * sum(factors)
+            )
         
         return avg_weights
     
@@ -103,28 +105,26 @@ class AggregationStrategies:
             logger.warning("Not enough clients for Krum, using average")
             return AggregationStrategies.simple_average(client_weights)
         
-        # Calculate distances between all client updates
-        distances = np.zeros((n, n))
-        
-        for i in range(n):
-            for j in range(i+1, n):
-                dist = AggregationStrategies._weight_distance(
-                    client_weights[i], 
-                    client_weights[j]
-                )
-                distances[i, j] = dist
-                distances[j, i] = dist
-        
-        # Find the update with minimal sum of distances to nearest n-f-2 updates
-        scores = []
-        for i in range(n):
-            # Sort distances and take closest n-f-2
-            sorted_dists = np.sort(distances[i])
-            score = np.sum(sorted_dists[:n-f-2])
-            scores.append(score)
+        # Calculate distances between all client updates from one Gram
+        # matrix product over the flattened (n, D) matrix. The expansion
+        # |a|^2 + |b|^2 - 2ab cancels badly for nearby updates, so it runs in
+        # float64 on updates centered on their mean (distances are unchanged)
+        flat = AggregationStrategies._flatten(client_weights, torch.float64)
+        flat -= flat.mean(dim=0)
+        gram = flat @ flat.T
+        sq_norms = torch.diagonal(gram)
+        distances = torch.sqrt(torch.clamp(
+            sq_norms[:, None] + sq_norms[None, :] - 2.0 * gram, min=0.0
+        )).cpu().numpy()
+        np.fill_diagonal(distances, 0.0)
+        
+        # Find the update with minimal sum of distances to nearest n-f-2
+        # updates; a partition finds each row's smallest n-f-2 without sorting
+        k = n - f - 2
+        scores = np.sum(np.partition(distances, k, axis=1)[:, :k], axis=1)
         
         # Select the update with minimum score
-        selected_idx = np.argmin(scores)
+        selected_idx = int(np.argmin(scores))
         
         logger.info(f"Krum selected client {selected_idx} from {n} clients")
         
@@ -141,31 +141,21 @@ class AggregationStrategies:
             logger.warning("Not enough clients for Trimmed Mean, using median")
             return AggregationStrategies.coordinatewise_median(client_weights)
         
-        avg_weights = {}
-        
-        # For each parameter
-        for key in client_weights[0].keys():
-            values = [weights[key] for weights in client_weights]
-            stacked = torch.stack(values)
-            
-            # Trim extreme values and average
-            sorted_values, _ = torch.sort(stacked, dim=0)
-            trimmed = sorted_values[k:n-k, :]
-            avg_weights[key] = torch.mean(trimmed, dim=0)
+        # One sort over every parameter at once, laid out (D, n) so each
+        # coordinate's client values are contiguous
+        columns = AggregationStrategies._flatten(client_weights).T.contiguous()
         
-        return avg_weights
+        # Trim extreme values and average
+        sorted_values, _ = torch.sort(columns, dim=1)
+        trimmed = sorted_values[:, k:n-k]
+        return AggregationStrategies._unflatten(torch.mean(trimmed, dim=1), client_weights[0])
     
     @staticmethod
     def coordinatewise_median(client_weights: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Coordinate-wise Median aggregation"""
-        avg_weights = {}
-        
-        for key in client_weights[0].keys():
-            values = [weights[key] for weights in client_weights]
-            stacked = torch.stack(values)
-            avg_weights[key] = torch.median(stacked, dim=0).values
-        
-        return avg_weights
+        flat = AggregationStrategies._flatten(client_weights)
+        median = torch.median(flat, dim=0).values
+        return AggregationStrategies._unflatten(median, client_weights[0])
     
     @staticmethod
     def adaptive_aggregation(client_weights: List[Dict[str, Any]],
@@ -192,37 +182,68 @@ class AggregationStrategies:
             weights = np.ones(len(weights)) / len(weights)
         
         # Weighted average
-        avg_weights = {}
-        for i, client_weight in enumerate(client_weights):
-            for key, value in client_weight.items():
-                if key not in avg_weights:
-                    avg_weights[key] = torch.zeros_like(value)
-                avg_weights[key] += value * weights[i]
-        
-        return avg_weights
+        return AggregationStrategies._weighted_sum(client_weights, weights.tolist())
+    
+    @staticmethod
+    def _weighted_sum(client_weights: List[Dict[str, Any]],
+                      factors: List[float]) -> Dict[str, Any]:
+        """
+        Sum of client weights scaled by per-client factors
+        
+        The accumulator is allocated once from the first client, and each
+        client is added with a single multi-tensor _foreach_add_ call
+        rather than one Python-level add per parameter.
+        """
+        if not client_weights:
+            return {}
+        
+        keys = list(client_weights[0].keys())
+        avg_list = [torch.zeros_like(client_weights[0][key]) for key in keys]
+        for weights, factor in zip(client_weights, factors):
+            torch._foreach_add_(avg_list, [weights[key] for key in keys], alpha=factor)
+        
+        return dict(zip(keys, avg_list))
     
     @staticmethod
-    def _weight_distance(weights1: Dict[str, Any], 
-                        weights2: Dict[str, Any]) -> float:
-        """Calculate Euclidean distance between weight dictionaries"""
-        distance = 0
-        for key in weights1.keys():
-            diff = weights1[key] - weights2[key]
-            distance += torch.sum(diff ** 2).item()
-        return np.sqrt(distance)
+    def _flatten(client_weights: List[Dict[str, Any]],
+                 dtype: Optional[torch.dtype] = None,
+                 device: torch.device = AGGREGATION_DEVICE) -> torch.Tensor:
+        """
+        Stack each client's parameters, flattened in key order, into an
+        (n, D) matrix on device, copying every tensor once (and casting it
+        on the way when a dtype is given)
+        """
+        keys = list(client_weights[0].keys())
+        first = [client_weights[0][key] for key in keys]
+        sizes = [value.numel() for value in first]
+        if dtype is None:
+            dtype = functools.reduce(torch.promote_types, [value.dtype for value in first])
+        flat = torch.empty((len(client_weights), sum(sizes)), dtype=dtype, device=device)
+        for row, weights in zip(flat, client_weights):
+            for part, key in zip(row.split(sizes), keys):
+                part.copy_(weights[key].reshape(-1), non_blocking=True)
+        return flat
+    
+    @staticmethod
+    def _unflatten(flat: torch.Tensor, template: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Split a flattened parameter vector back into template's keys,
+        shapes, dtypes and devices
+        """
+        keys = list(template.keys())
+        parts = flat.split([template[key].numel() for key in keys])
+        return {
+            key: part.view_as(template[key]).to(template[key].device, template[key].dtype)
+            for key, part in zip(keys, parts)
+        }
     
     @staticmethod
     def simple_average(client_weights: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Simple average of client weights"""
-        avg_weights = {}
-        
-        for weights in client_weights:
-            for key, value in weights.items():
-                if key not in avg_weights:
-                    avg_weights[key] = torch.zeros_like(value)
-                avg_weights[key] += value
-        
-        for key in avg_weights:
-            avg_weights[key] /= len(client_weights)
+        avg_weights = AggregationStrategies._weighted_sum(
+            client_weights, [1.0] * len(client_weights)
+        )
+        if avg_weights:
+            torch._foreach_div_(list(avg_weights.values()), len(client_weights))
         
         return avg_weights
\ No newline at end of file
@@ -2,7 +2,6 @@
 Federated Learning Client for distributed training
 """
 import numpy as np
-import pickle
 import json
 import os
 from typing import Dict, List, Any, Tuple
@@ -52,11 +51,24 @@ class FederatedClient:
     def _initialize_client(self):
         """Initialize client with local data"""
         # Load client-specific data
-        data_path = os.path.join(self.data_dir, f'client_{self.client_id}.pkl')
+        index_path = os.path.join(self.data_dir, 'clients.json')
         try:
-            if os.path.exists(data_path):
-                with open(data_path, 'rb') as f:
-                    self.local_data = pickle.load(f)
+            clients = []
+            if os.path.exists(index_path):
+                with open(index_path, 'r') as f:
+                    index = json.load(f)
+                clients = index['clients']
+            
+            client_idx = int(self.client_id)
+            if 0 <= client_idx < len(clients):
+                # Memory-map the shared arrays; only this client's rows are touched
+                rows = slice(clients[client_idx]['start'], clients[client_idx]['stop'])
+                features = np.load(os.path.join(self.data_dir, index['features']), mmap_mode='r')
+                labels = np.load(os.path.join(self.data_dir, index['labels']), mmap_mode='r')
+                self.local_data = {
+                    'features': features[rows],
+                    'labels': labels[rows]
+                }
                 logger.info(f"Client {self.client_id} loaded local data")
             else:
                 logger.warning(f"No local data found for client {self.client_id}")
@@ -0,0 +1,19 @@
+"""
+Gunicorn configuration for serving the API in production
+
+Usage: gunicorn -c gunicorn_conf.py app:app
+"""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5001')
+
+# Green-thread worker so each WebSocket connection is cheap
+worker_class = 'eventlet'
+worker_connections = 2000
+
+# Socket.IO needs sticky sessions; run more than one worker only behind a
+# sticky load balancer and with SOCKETIO_MESSAGE_QUEUE set (e.g. Redis)
+workers = int(os.environ.get('GUNICORN_WORKERS', 1))
+
+loglevel = os.environ.get('LOG_LEVEL', 'warning').lower()
+accesslog = None
@@ -2,13 +2,15 @@
 Prediction endpoints for heart disease risk assessment
 """
 from flask import Blueprint, request, jsonify
+import math
 import numpy as np
 import json
 
 from services.prediction_service import PredictionService
 from services.model_swapper import ModelSwapper
 from drift.detector import DriftDetector
-from utils.helpers import validate_patient_data
+from utils.helpers import request_timestamp, validate_patient_data
+from utils.jit import njit
 
 predict_bp = Blueprint('predict', __name__)
 
@@ -17,15 +19,221 @@ prediction_service = PredictionService()
 model_swapper = ModelSwapper()
 drift_detector = DriftDetector()
 
+def risk_scores(features):
+    """
+    Rule-based cardiovascular risk points, computed without Python branches
+    
+    Accepts one 13-feature vector or an (N, 13) array and returns a score per
+    row. Each guideline contributes through comparison masks.
+    """
+    X = np.asarray(features, dtype=np.float64)
+    age, sex, cp, trestbps, chol, fbs, _, thalach, exang, oldpeak, _, ca, thal = np.moveaxis(X, -1, 0)
+    
+    return (
+        ca  # Number of major vessels (0-3); more vessels = higher risk
+        + (age >= 55) * 2 + ((age >= 45) & (age < 55))
+        + (sex == 1)  # Male
+        + (chol >= 240) * 2 + ((chol >= 200) & (chol < 240))
+        # Hypertension, elevated BP, or hypotension
+        + (trestbps >= 140) * 2 + ((trestbps >= 130) & (trestbps < 140)) + (trestbps < 90)
+        + (thalach < 100)  # Low max heart rate can indicate issues
+        + (cp == 4) * 2 + (cp == 1)  # Asymptomatic (most severe), typical angina
+        + (oldpeak >= 2) * 2 + ((oldpeak >= 1) & (oldpeak < 2))  # ST depression
+        + (thal == 7) * 2 + (thal == 6)  # Reversible, fixed defect
+        + (fbs == 1)  # Fasting blood sugar > 120 mg/dl
+        + (exang == 1)  # Exercise induced angina
+    )
+
+@njit(cache=True)
+def _score_features_nb(age, sex, cp, trestbps, chol, fbs, restecg, thalach,
+                       exang, oldpeak, slope, ca, thal):
+    """Compiled single-sample risk score and capped probability"""
+    risk_score = ca  # Number of major vessels (0-3)
+    
+    if age >= 55:
+        risk_score += 2
+    elif age >= 45:
+        risk_score += 1
+    if sex == 1:  # Male
+        risk_score += 1
+    if chol >= 240:
+        risk_score += 2
+    elif chol >= 200:
+        risk_score += 1
+    if trestbps >= 140:
+        risk_score += 2
+    elif trestbps >= 130 or trestbps < 90:  # Elevated BP or hypotension
+        risk_score += 1
+    if thalach < 100:
+        risk_score += 1
+    if cp == 4:  # Asymptomatic (most severe)
+        risk_score += 2
+    elif cp == 1:  # Typical angina
+        risk_score += 1
+    if oldpeak >= 2:
+        risk_score += 2
+    elif oldpeak >= 1:
+        risk_score += 1
+    if thal == 7:  # Reversible defect
+        risk_score += 2
+    elif thal == 6:  # Fixed defect
+        risk_score += 1
+    if fbs == 1:
+        risk_score += 1
+    if exang == 1:
+        risk_score += 1
+    
+    # Sigmoid over the 20-point scale, capped between 0.05 and 0.95
+    probability = 1.0 / (1.0 + math.exp(-5.0 * (risk_score / 20.0 - 0.5)))
+    return risk_score, min(0.95, max(0.05, probability))
+
+# Compile at import so the first request does not pay for it
+_score_features_nb(*([0.0] * 13))
+
+def validate_features(features) -> list:
+    """Return physiological range violations for a 13-feature vector"""
+    # Unpack features with proper names
+    age, sex, cp, trestbps, chol, fbs, restecg, thalach, exang, oldpeak, slope, ca, thal = features
+    
+    # Validate physiological ranges
+    validation_errors = []
+    
+    # Age validation
+    if age < 20 or age > 100:
+        validation_errors.append(f"Age ({age}) outside plausible range (20-100)")
+    
+    # Resting BP validation (in mmHg)
+    if trestbps < 80 or trestbps > 200:
+        validation_errors.append(f"Resting BP ({trestbps} mmHg) outside plausible range (80-200)")
+    
+    # Cholesterol validation (in mg/dl)
+    if chol < 100 or chol > 600:
+        validation_errors.append(f"Cholesterol ({chol} mg/dl) outside plausible range (100-600)")
+    
+    # Max heart rate validation (should be ~220 - age)
+    expected_max_hr = 220 - age
+    if thalach < 60 or thalach > 220:
+        validation_errors.append(f"Max heart rate ({thalach} bpm) outside plausible range (60-220)")
+    elif thalach > expected_max_hr * 1.2:  # Allow 20% above theoretical max
+        validation_errors.append(f"Max heart rate ({thalach} bpm) exceeds plausible maximum (~{expected_max_hr})")
+    
+    return validation_errors
+
+def score_features(features, model_type: str = 'federated') -> dict:
+    """
+    Rule-based heart disease risk assessment for one valid 13-feature vector
+    
+    Pure function used by /predict and /test-prediction; callers validate
+    the input first (see validate_features).
+    """
+    age, sex, cp, trestbps, chol, fbs, restecg, thalach, exang, oldpeak, slope, ca, thal = features
+    
+    # Calculate risk based on medical guidelines, converted to a capped
+    # sigmoid probability (0-1 scale)
+    max_possible_score = 20
+    risk_score, probability = _score_features_nb(*[float(value) for value in features])
+    risk_score = int(risk_score)
+    
+    # Convert to prediction (1 = disease, 0 = no disease)
+    prediction = 1 if probability > 0.5 else 0
+    
+    # Determine risk level
+    if probability < 0.3:
+        risk_level = 'Low'
+        recommendation = 'Continue healthy lifestyle with regular checkups. Your vital signs are within normal ranges.'
+    elif probability < 0.7:
+        risk_level = 'Moderate'
+        recommendation = 'Consider lifestyle changes (diet, exercise) and consult a cardiologist for further evaluation.'
+    else:
+        risk_level = 'High'
+        recommendation = 'Immediate consultation with a cardiologist is recommended. Please seek medical attention.'
+    
+    # Add specific warnings based on abnormal values
+    warnings = []
+    if trestbps < 90:
+        warnings.append("Low resting blood pressure detected (hypotension)")
+    elif trestbps >= 140:
+        warnings.append("High blood pressure detected (hypertension)")
+    
+    if chol >= 240:
+        warnings.append("High cholesterol level (hypercholesterolemia)")
+    
+    if thalach < 100:
+        warnings.append("Low maximum heart rate during exercise")
+    
+    if oldpeak >= 1.5:
+        warnings.append("Significant ST depression detected")
+    
+    # Create risk factor analysis
+    risk_factors = {
+        'age_risk': 'High' if age >= 55 else 'Moderate' if age >= 45 else 'Low',
+        'bp_risk': 'High' if trestbps >= 140 else 'Moderate' if trestbps >= 130 or trestbps < 90 else 'Low',
+        'chol_risk': 'High' if chol >= 240 else 'Moderate' if chol >= 200 else 'Low',
+        'hr_risk': 'Concerning' if thalach < 100 else 'Normal',
+        'st_depression': 'Significant' if oldpeak >= 1.5 else 'Moderate' if oldpeak >= 1.0 else 'Normal'
+    }
+    
+    return {
+        'prediction': prediction,
+        'probability': round(probability, 3),
+        'risk_level': risk_level,
+        'risk_percentage': round(probability * 100, 1),
+        'model_used': model_type,
+        'recommendations': recommendation,
+        'warnings': warnings,
+        'risk_factors': risk_factors,
+        'risk_score': risk_score,
+        'max_risk_score': max_possible_score,
+        'message': 'Prediction completed successfully',
+        'interpretation': f'{risk_level} risk of cardiovascular disease'
+    }
+
+def _rule_based_prediction(features, model_type):
+    """Score features against medical guidelines when no trained model is loaded"""
+    # Validate features length
+    if len(features) != 13:
+        return jsonify({
+            'status': 'error',
+            'message': f'Expected 13 features, got {len(features)}'
+        }), 400
+    
+    validation_errors = validate_features(features)
+    
+    # If validation errors, return them
+    if validation_errors:
+        return jsonify({
+            'status': 'validation_error',
+            'message': 'Input validation failed',
+            'errors': validation_errors,
+            'timestamp': request_timestamp()
+        }), 400
+    
+    return jsonify({
+        'status': 'success',
+        'data': {**score_features(features, model_type), 'timestamp': request_timestamp()}
+    })
+
 @predict_bp.route('/predict', methods=['POST'])
 def predict():
     """
     Make heart disease prediction for a patient
     Expects JSON with patient features
+    
+    Uses the trained model for model_type when it is loaded and falls back
+    to the rule-based risk score otherwise.
     """
     try:
         data = request.get_json()
         
+        if not data or 'features' not in data:
+            return jsonify({
+                'status': 'error',
+                'message': 'Missing features in request'
+            }), 400
+        
+        if not prediction_service.has_model(data.get('model_type', 'federated')):
+            return _rule_based_prediction(data['features'], data.get('model_type', 'federated'))
+        
         # Validate input
         validation_result = validate_patient_data(data)
         if not validation_result['valid']:
@@ -81,6 +289,95 @@ def predict():
             'error': str(e)
         }), 500
 
+@predict_bp.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Score an (N, 13) batch of feature vectors in one vectorized pass"""
+    try:
+        data = request.get_json()
+        
+        if not data or 'features' not in data:
+            return jsonify({
+                'status': 'error',
+                'message': 'Missing features in request'
+            }), 400
+        
+        model_type = data.get('model_type', 'federated')
+        
+        try:
+            X = np.asarray(data['features'], dtype=np.float64)
+        except (ValueError, TypeError):
+            # Ragged rows or non-numeric values
+            return jsonify({
+                'status': 'error',
+                'message': 'Expected an N x 13 feature matrix of numbers'
+            }), 400
+        
+        if X.ndim != 2 or X.shape[1] != 13:
+            return jsonify({
+                'status': 'error',
+                'message': f'Expected an N x 13 feature matrix, got shape {list(X.shape)}'
+            }), 400
+        
+        # Validate physiological ranges for every row at once
+        age, trestbps, chol, thalach = X[:, 0], X[:, 3], X[:, 4], X[:, 7]
+        invalid = (
+            (age < 20) | (age > 100)
+            | (trestbps < 80) | (trestbps > 200)
+            | (chol < 100) | (chol > 600)
+            | (thalach < 60) | (thalach > 220)
+            | (thalach > (220 - age) * 1.2)
+        )
+        if invalid.any():
+            return jsonify({
+                'status': 'validation_error',
+                'message': 'Input validation failed',
+                'invalid_rows': np.flatnonzero(invalid).tolist(),
+                'timestamp': request_timestamp()
+            }), 400
+        
+        max_possible_score = 20
+        risk_score = risk_scores(X)
+        if prediction_service.has_model(model_type):
+            # One vectorized predict_proba call for the whole batch
+            probability = prediction_service.predict_proba_batch(X, model_type)
+        else:
+            probability = 1 / (1 + np.exp(-5 * (risk_score / max_possible_score - 0.5)))
+            probability = np.clip(probability, 0.05, 0.95)
+        prediction = (probability > 0.5).astype(int)
+        risk_level = np.where(
+            probability < 0.3, 'Low', np.where(probability < 0.7, 'Moderate', 'High')
+        )
+        
+        predictions = [
+            {
+                'prediction': pred,
+                'probability': round(prob, 3),
+                'risk_level': level,
+                'risk_percentage': round(prob * 100, 1),
+                'risk_score': int(score)
+            }
+            for pred, prob, level, score in zip(
+                prediction.tolist(), probability.tolist(), risk_level.tolist(), risk_score.tolist()
+            )
+        ]
+        
+        return jsonify({
+            'status': 'success',
+            'data': {
+                'predictions': predictions,
+                'count': len(predictions),
+                'model_used': model_type,
+                'max_risk_score': max_possible_score,
+                'timestamp': request_timestamp()
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
 @predict_bp.route('/batch_predict', methods=['POST'])
 def batch_predict():
     """
@@ -154,4 +451,15 @@ def retrain_model():
             'status': 'error',
             'message': 'Retraining failed',
             'error': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
+
+# Quick test endpoint for prediction
+@predict_bp.route('/test-prediction', methods=['GET'])
+def test_prediction():
+    """Test endpoint with sample data"""
+    sample_features = [45, 1, 2, 120, 240, 0, 1, 150, 0, 1.5, 1, 0, 3]
+    
+    return jsonify({
+        'status': 'success',
+        'data': {**score_features(sample_features), 'timestamp': request_timestamp()}
+    })
\ No newline at end of file
@@ -2,16 +2,63 @@
 Model swapping service for handling concept drift
 """
 import os
-import pickle
 import json
+import threading
+import time
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
+import joblib
 import numpy as np
 
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Deserialized models keyed by file path, shared by every swapper in the
+# process. Each entry keeps the file's st_mtime_ns, so a model retrained
+# and rewritten in place is reloaded on its next use
+_MODEL_CACHE: Dict[str, tuple] = {}  # path -> (mtime_ns, model)
+_MODEL_CACHE_LOCK = threading.Lock()
+
+# Directory listings used to tell which models exist, refreshed at most
+# every _MODEL_LIST_TTL seconds instead of probing the disk on every swap
+_MODEL_LIST_TTL = 60
+_MODEL_LIST_CACHE: Dict[str, tuple] = {}  # directory -> (listed_at, file names)
+
+def _listed_files(directory: str) -> frozenset:
+    """Return the file names in directory, from a listing at most _MODEL_LIST_TTL old"""
+    now = time.monotonic()
+    cached = _MODEL_LIST_CACHE.get(directory)
+    if cached is None or now - cached[0] >= _MODEL_LIST_TTL:
+        try:
+            with os.scandir(directory) as entries:
+                names = frozenset(entry.name for entry in entries if entry.is_file())
+        except FileNotFoundError:
+            names = frozenset()
+        cached = _MODEL_LIST_CACHE[directory] = (now, names)
+    return cached[1]
+
+def _get_model(model_path: str):
+    """Return the deserialized model at model_path, reloading it if the file changed"""
+    directory, filename = os.path.split(model_path)
+    if filename not in _listed_files(directory):
+        return None
+    try:
+        mtime_ns = os.stat(model_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    
+    cached = _MODEL_CACHE.get(model_path)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    
+    with _MODEL_CACHE_LOCK:
+        # Another thread may have loaded it while we waited for the lock
+        cached = _MODEL_CACHE.get(model_path)
+        if cached is None or cached[0] != mtime_ns:
+            cached = _MODEL_CACHE[model_path] = (mtime_ns, joblib.load(model_path))
+    return cached[1]
+
 class ModelSwapper:
     """Service for swapping models based on detected concept drift"""
     
@@ -157,9 +204,7 @@ class ModelSwapper:
         
         model_path = os.path.join(self.model_dir, self.specialized_models[model_type])
         try:
-            if os.path.exists(model_path):
-                with open(model_path, 'rb') as f:
-                    return pickle.load(f)
+            return _get_model(model_path)
         except Exception as e:
             logger.error(f"Failed to load model {model_type}: {e}")
         
@@ -5,6 +5,7 @@ import numpy as np
 import joblib
 import os
 import pickle
+import threading
 from typing import Dict, List, Any, Tuple
 from datetime import datetime
 import json
@@ -15,6 +16,17 @@ from drift.detector import DriftDetector
 
 logger = get_logger(__name__)
 
+# Per-thread (1, n_features) input row, reused across predictions
+_scratch = threading.local()
+
+def _feature_row(values) -> np.ndarray:
+    """Copy feature values into this thread's reusable 2D input row"""
+    row = getattr(_scratch, 'row', None)
+    if row is None or row.shape[1] != len(values):
+        row = _scratch.row = np.empty((1, len(values)))
+    row[0] = values
+    return row
+
 class PredictionService:
     """Service for making heart disease predictions"""
     
@@ -134,8 +146,7 @@ class PredictionService:
                 scaled_features = self.scaler.transform(features)
             else:
                 # Scikit-learn scaler expects 2D array
-                features_array = np.array(features).reshape(1, -1)
-                scaled_features = self.scaler.transform(features_array)[0]
+                scaled_features = self.scaler.transform(_feature_row(features))[0]
             
             # Select model
             model = self.models.get(model_type, self.models['federated'])
@@ -143,7 +154,7 @@ class PredictionService:
                 raise ValueError(f"Model {model_type} not loaded")
             
             # Make prediction
-            features_array = np.array(scaled_features).reshape(1, -1)
+            features_array = _feature_row(scaled_features)
             prediction_proba = model.predict_proba(features_array)[0]
             prediction = model.predict(features_array)[0]
             
@@ -176,6 +187,32 @@ class PredictionService:
             logger.error(f"Prediction failed: {e}")
             raise
     
+    def has_model(self, model_type: str) -> bool:
+        """Check if predict() would find a loaded model for model_type"""
+        return self.models.get(model_type, self.models['federated']) is not None
+    
+    def predict_proba_batch(self, X: np.ndarray, model_type: str = 'federated') -> np.ndarray:
+        """
+        Disease probabilities for an (N, n_features) batch in one model call
+        
+        Args:
+            X: Feature matrix, one row per patient
+            model_type: Type of model to use
+            
+        Returns:
+            Array of N probabilities of heart disease
+        """
+        if isinstance(self.scaler, DataScaler):
+            scaled = np.array([self.scaler.transform(row) for row in X])
+        else:
+            scaled = self.scaler.transform(X)
+        
+        model = self.models.get(model_type, self.models['federated'])
+        if model is None:
+            raise ValueError(f"Model {model_type} not loaded")
+        
+        return model.predict_proba(scaled)[:, 1]
+    
     def _interpret_prediction(self, probabilities: np.ndarray) -> str:
         """Interpret prediction probabilities into risk levels"""
         disease_prob = probabilities[1]
@@ -2,15 +2,14 @@
 """
 Simple test to verify models are working
 """
-import pickle
+import joblib
 import numpy as np
 import pandas as pd
 
 def test_model(model_path, test_features):
     """Test a single model"""
     try:
-        with open(model_path, 'rb') as f:
-            model = pickle.load(f)
+        model = joblib.load(model_path)
         
         prediction = model.predict([test_features])
         proba = model.predict_proba([test_features])
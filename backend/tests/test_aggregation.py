@@ -0,0 +1,156 @@
+"""
+Equivalence tests for the aggregation strategies against per-key reference
+implementations (the original dict-of-tensors loops)
+"""
+import numpy as np
+import pytest
+import torch
+
+from federated.aggregation import AggregationStrategies
+
+SHAPES = {'fc1.weight': (16, 13), 'fc1.bias': (16,), 'fc2.weight': (2, 16), 'fc2.bias': (2,)}
+
+def _clients(n, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    return [
+        {key: torch.randn(shape, generator=generator) for key, shape in SHAPES.items()}
+        for _ in range(n)
+    ]
+
+def _assert_weights_close(actual, expected, **kwargs):
+    assert list(actual) == list(expected)
+    for key in expected:
+        assert actual[key].shape == expected[key].shape
+        assert actual[key].dtype == expected[key].dtype
+        torch.testing.assert_close(actual[key], expected[key], **kwargs)
+
+def _fedavg_reference(client_weights, client_samples):
+    total = sum(client_samples)
+    avg = {}
+    for weights, samples in zip(client_weights, client_samples):
+        for key, value in weights.items():
+            avg.setdefault(key, torch.zeros_like(value))
+            avg[key] += value * (samples / total)
+    return avg
+
+def _fedprox_reference(client_weights, client_samples, global_weights, mu):
+    total = sum(client_samples)
+    avg = {}
+    for weights, samples in zip(client_weights, client_samples):
+        for key, value in weights.items():
+            avg.setdefault(key, torch.zeros_like(value))
+            proximal_term = mu * (value - global_weights[key])
+            avg[key] += (value - proximal_term) * (samples / total)
+    return avg
+
+def _adaptive_reference(client_weights, client_metrics):
+    factors = np.array([
+        m.get('accuracy', 0.5) * np.log(m.get('samples_used', 1)) / (m.get('loss', 1.0) + 1e-8)
+        for m in client_metrics
+    ])
+    factors = factors / factors.sum()
+    return _fedavg_reference(client_weights, factors.tolist())
+
+def _trimmed_mean_reference(client_weights, trim_ratio):
+    n = len(client_weights)
+    k = int(trim_ratio * n)
+    avg = {}
+    for key in client_weights[0]:
+        stacked = torch.stack([weights[key] for weights in client_weights])
+        sorted_values, _ = torch.sort(stacked, dim=0)
+        avg[key] = torch.mean(sorted_values[k:n - k], dim=0)
+    return avg
+
+def _median_reference(client_weights):
+    return {
+        key: torch.median(torch.stack([weights[key] for weights in client_weights]), dim=0).values
+        for key in client_weights[0]
+    }
+
+def _krum_reference_index(client_weights, f):
+    n = len(client_weights)
+    distances = np.zeros((n, n))
+    for i in range(n):
+        for j in range(i + 1, n):
+            dist = np.sqrt(sum(
+                torch.sum((client_weights[i][key] - client_weights[j][key]) ** 2).item()
+                for key in client_weights[i]
+            ))
+            distances[i, j] = distances[j, i] = dist
+    scores = [np.sum(np.sort(row)[:n - f - 2]) for row in distances]
+    return int(np.argmin(scores))
+
+def test_fedavg_matches_reference():
+    clients = _clients(6)
+    samples = [10, 250, 3, 70, 70, 1]
+    _assert_weights_close(AggregationStrategies.fedavg(clients, samples),
+                          _fedavg_reference(clients, samples))
+
+def test_simple_average_matches_reference():
+    clients = _clients(5, seed=1)
+    _assert_weights_close(AggregationStrategies.simple_average(clients),
+                          _fedavg_reference(clients, [1] * len(clients)))
+
+@pytest.mark.parametrize('mu', [0.0, 0.01, 0.5])
+def test_fedprox_matches_reference(mu):
+    clients = _clients(4, seed=3)
+    global_weights = _clients(1, seed=99)[0]
+    samples = [5, 40, 12, 1]
+    _assert_weights_close(AggregationStrategies.fedprox(clients, samples, global_weights, mu),
+                          _fedprox_reference(clients, samples, global_weights, mu))
+
+def test_adaptive_aggregation_matches_reference():
+    clients = _clients(4, seed=5)
+    metrics = [
+        {'accuracy': 0.9, 'loss': 0.3, 'samples_used': 120},
+        {'accuracy': 0.6, 'loss': 0.8, 'samples_used': 40},
+        {'loss': 1.2, 'samples_used': 7},
+        {'accuracy': 0.75, 'samples_used': 300},
+    ]
+    _assert_weights_close(AggregationStrategies.adaptive_aggregation(clients, metrics),
+                          _adaptive_reference(clients, metrics))
+
+@pytest.mark.parametrize('n, trim_ratio', [(10, 0.2), (7, 0.1), (5, 0.0)])
+def test_trimmed_mean_matches_reference(n, trim_ratio):
+    clients = _clients(n, seed=n)
+    _assert_weights_close(AggregationStrategies.trimmed_mean(clients, trim_ratio),
+                          _trimmed_mean_reference(clients, trim_ratio))
+
+@pytest.mark.parametrize('n', [5, 6])
+def test_median_matches_reference(n):
+    # An even client count takes the lower of the two middle values, as torch.median does
+    clients = _clients(n, seed=10 + n)
+    _assert_weights_close(AggregationStrategies.coordinatewise_median(clients),
+                          _median_reference(clients), rtol=0, atol=0)
+
+def test_median_keeps_integer_buffers():
+    clients = _clients(5, seed=2)
+    for i, weights in enumerate(clients):
+        weights['bn.num_batches_tracked'] = torch.tensor(i * 3)
+    
+    result = AggregationStrategies.coordinatewise_median(clients)
+    assert result['bn.num_batches_tracked'].dtype == torch.int64
+    assert result['bn.num_batches_tracked'].item() == 6
+
+@pytest.mark.parametrize('seed', range(5))
+def test_krum_selects_reference_client(seed):
+    clients = _clients(9, seed=seed)
+    # Two outlying (Byzantine) clients
+    for key in clients[0]:
+        clients[3][key] = clients[3][key] * 50
+        clients[7][key] = clients[7][key] + 20
+    
+    selected = AggregationStrategies.krum(clients, byzantine_tolerance=2)
+    assert selected is clients[_krum_reference_index(clients, 2)]
+
+def test_krum_separates_nearby_updates():
+    # Updates that differ by far less than their norm, where the expanded
+    # |a|^2 + |b|^2 - 2ab form cancels badly in float32
+    base = _clients(1, seed=4)[0]
+    clients = []
+    for i in range(7):
+        noise = _clients(1, seed=100 + i)[0]
+        clients.append({key: base[key] * 1e3 + noise[key] * 1e-3 * (1 + i) for key in base})
+    
+    selected = AggregationStrategies.krum(clients, byzantine_tolerance=1)
+    assert selected is clients[_krum_reference_index(clients, 1)]
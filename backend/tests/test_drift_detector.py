@@ -0,0 +1,92 @@
+"""
+Tests for the drift detector
+"""
+import numpy as np
+import pytest
+from scipy import stats
+
+from drift.detector import DriftDetector, _QUANT_LEVELS
+
+WINDOW = 50
+
+def _fill(detector, rng, n, patient_id='p1', n_features=4):
+    """Feed n stationary samples through the cheap custom-pattern path"""
+    for _ in range(n):
+        features = rng.standard_normal(n_features).tolist()
+        detector.detect_drift(features, 0, patient_id, method='custom')
+    return detector.patient_data[patient_id]
+
+def test_cascade_refreshes_stale_cluster_centers():
+    rng = np.random.default_rng(0)
+    detector = DriftDetector(window_size=WINDOW)
+    patient = _fill(detector, rng, 2 * WINDOW)
+    
+    # Centers left over from a window far from the current data
+    stale = np.full((3, 4), 5.0, dtype=np.float32)
+    patient['statistics']['cluster_centers'] = stale.copy()
+    
+    features = rng.standard_normal(4).tolist()
+    result = detector.detect_drift(features, 0, 'p1', method='auto')
+    
+    centers = patient['statistics']['cluster_centers']
+    recent_mean = detector._feature_window(patient, WINDOW).mean(axis=0)
+    assert result['method'] == 'ensemble'
+    assert np.linalg.norm(stale - recent_mean, axis=1).min() > 5.0
+    assert np.linalg.norm(centers - recent_mean, axis=1).min() < 1.0
+
+def test_refresh_is_one_lloyd_step():
+    detector = DriftDetector(window_size=WINDOW)
+    patient = {'count': 100, 'statistics': {
+        'cluster_centers': np.array([[0.0, 0.0], [10.0, 10.0], [100.0, 100.0]])
+    }}
+    recent = np.array([[1.0, 1.0], [3.0, 3.0], [9.0, 9.0], [np.nan, 0.0]], dtype=np.float32)
+    
+    detector._refresh_cluster_centers(patient, recent)
+    
+    # Rows with NaNs are ignored and a center with no rows stays put
+    np.testing.assert_allclose(
+        patient['statistics']['cluster_centers'],
+        [[2.0, 2.0], [9.0, 9.0], [100.0, 100.0]]
+    )
+
+@pytest.mark.parametrize('ranges', [
+    [(0.0, 1.0), (2.0, 2.0)],
+    [(0.0, 1.0), (3.0, 2.0)],
+    [(0.0, np.nan)],
+    [0.0, 1.0],
+])
+def test_invalid_feature_ranges_are_rejected(ranges):
+    with pytest.raises(ValueError):
+        DriftDetector(feature_ranges=ranges)
+
+def test_quantized_round_trip_within_one_step():
+    ranges = [(0.0, 10.0), (-5.0, 5.0)]
+    detector = DriftDetector(feature_ranges=ranges)
+    values = np.array([[0.0, -5.0], [3.3, 0.1], [10.0, 5.0], [np.nan, 2.5]], dtype=np.float32)
+    
+    restored = detector._dequantize(detector._quantize(values))
+    
+    step = np.array([hi - lo for lo, hi in ranges]) / _QUANT_LEVELS
+    assert np.isnan(restored[3, 0])
+    finite = ~np.isnan(values)
+    assert np.all(np.abs(restored - values)[finite] <= np.broadcast_to(step, values.shape)[finite])
+
+def test_fisher_combination_matches_scipy():
+    detector = DriftDetector()
+    p_values = np.array([0.2, 0.03, 0.5, 0.9, 1e-6])
+    
+    result = detector._fisher_result(p_values)
+    expected = stats.combine_pvalues(p_values, method='fisher').pvalue
+    assert result['p_value'] == pytest.approx(expected, rel=1e-10)
+
+def test_fisher_zero_p_value_is_zero():
+    detector = DriftDetector()
+    assert detector._fisher_result(np.array([0.0, 0.5]))['p_value'] == 0.0
+
+def test_all_nan_js_columns_are_skipped():
+    detector = DriftDetector()
+    
+    result = detector._distribution_result(np.array([0.1, np.nan, 0.3]))
+    assert result['avg_js_divergence'] == pytest.approx(0.2)
+    assert result['features_analyzed'] == 2
+    assert detector._distribution_result(np.array([np.nan]))['confidence'] == 0.0
@@ -0,0 +1,114 @@
+"""
+Parity tests for the drift detector's Numba kernels against scipy/NumPy
+"""
+import math
+from fractions import Fraction
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from drift import _drift_kernels as kernels
+
+# Histogram bins per feature, as the detector uses
+JS_BINS = kernels.N_BINS
+
+def _windows(rng, n1, n2, n_features=6, shift=0.5):
+    """Reference/recent float32 windows with a tied column and a NaN"""
+    ref = rng.standard_normal((n1, n_features)).astype(np.float32)
+    rec = (rng.standard_normal((n2, n_features)) + shift).astype(np.float32)
+    ref[:, -1] = np.round(ref[:, -1])
+    rec[:, -1] = np.round(rec[:, -1])
+    ref[0, 1] = np.nan
+    return ref, rec
+
+@pytest.mark.parametrize('n1, n2', [(100, 100), (50, 100), (37, 91), (5, 7), (1000, 999)])
+@pytest.mark.parametrize('shift', [0.0, 0.3, 1.0])
+def test_ks_matches_scipy(n1, n2, shift):
+    rng = np.random.default_rng(n1 * n2)
+    ref, rec = _windows(rng, n1, n2, shift=shift)
+    
+    expected = [
+        stats.ks_2samp(ref[:, f], rec[:, f], nan_policy='omit').pvalue
+        for f in range(ref.shape[1])
+    ]
+    np.testing.assert_allclose(kernels._ks_2samp_cols(ref, rec), expected, rtol=1e-10)
+
+def _brute_outside_band(m, n, g, h):
+    """P(D >= h / lcm) by counting every lattice path that stays inside the band"""
+    inside = [[0] * (n + 1) for _ in range(m + 1)]
+    for x in range(m + 1):
+        for y in range(n + 1):
+            if abs(x * (n // g) - y * (m // g)) >= h:
+                continue
+            if x == 0 and y == 0:
+                inside[x][y] = 1
+            else:
+                inside[x][y] = (inside[x - 1][y] if x else 0) + (inside[x][y - 1] if y else 0)
+    return float(1 - Fraction(inside[m][n], math.comb(m + n, n)))
+
+def test_ks_exact_band_matches_path_count():
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        m, n = (int(v) for v in rng.integers(1, 40, size=2))
+        g = math.gcd(m, n)
+        h = int(rng.integers(1, m * n // g + 1))
+        assert kernels._ks_prob_outside_band(m, n, g, h) == pytest.approx(
+            _brute_outside_band(m, n, g, h), rel=1e-12, abs=1e-300
+        )
+
+def test_ks_constant_column_is_nan():
+    ref = np.ones((20, 1), dtype=np.float32)
+    rec = np.arange(20, dtype=np.float32)[:, None]
+    assert np.isnan(kernels._ks_2samp_cols(ref, rec)[0])
+
+@pytest.mark.parametrize('n1, n2', [(100, 100), (30, 80), (3, 4)])
+def test_welch_matches_scipy(n1, n2):
+    rng = np.random.default_rng(n1 + n2)
+    ref, rec = _windows(rng, n1, n2)
+    
+    # scipy keeps float32 inputs in float32; the kernel accumulates in float64
+    expected = stats.ttest_ind(ref.astype(np.float64), rec.astype(np.float64),
+                               equal_var=False, nan_policy='omit').pvalue
+    np.testing.assert_allclose(kernels._welch_t_cols(ref, rec), expected, rtol=1e-8)
+
+@pytest.mark.parametrize('k', [1, 2, 7, 13, 40])
+def test_chi2_sf_even_matches_scipy(k):
+    for x in [0.0, 0.5, 2.0, 10.0, 50.0, 200.0]:
+        assert kernels._chi2_sf_even(x, k) == pytest.approx(stats.chi2.sf(x, 2 * k), rel=1e-10, abs=1e-300)
+    assert kernels._chi2_sf_even(np.inf, k) == 0.0
+
+def _js_reference(ref_col, rec_col):
+    """The detector's JS divergence computed with np.histogram, as originally written"""
+    ref_hist, edges = np.histogram(ref_col, bins=JS_BINS, density=True)
+    rec_hist, _ = np.histogram(rec_col, bins=edges, density=True)
+    p = ref_hist + 1e-10
+    q = rec_hist + 1e-10
+    p /= p.sum()
+    q /= q.sum()
+    m = 0.5 * (p + q)
+    return 0.5 * np.sum(p * np.log(p / m)) + 0.5 * np.sum(q * np.log(q / m)), edges
+
+def test_js_divergence_matches_numpy_histograms():
+    rng = np.random.default_rng(7)
+    ref, rec = _windows(rng, 100, 100, shift=0.4)
+    ref = ref[1:]  # drop the NaN row; np.histogram cannot range over NaNs
+    
+    expected = []
+    edges = []
+    for f in range(ref.shape[1]):
+        js, col_edges = _js_reference(ref[:, f].astype(np.float64), rec[:, f].astype(np.float64))
+        expected.append(js)
+        edges.append(col_edges)
+    edges = np.array(edges)
+    
+    got = kernels._js_from_probs(kernels._binned_probs(ref, edges), kernels._binned_probs(rec, edges))
+    np.testing.assert_allclose(got, expected, rtol=1e-9, atol=1e-12)
+
+def test_col_stats_matches_numpy():
+    rng = np.random.default_rng(3)
+    features = rng.standard_normal((57, 13)).astype(np.float32) * 10 + 100
+    
+    mean, std = kernels._col_stats(features)
+    np.testing.assert_allclose(mean, features.mean(axis=0, dtype=np.float64), rtol=1e-10)
+    np.testing.assert_allclose(std, features.std(axis=0, dtype=np.float64), rtol=1e-8)
@@ -0,0 +1,30 @@
+"""
+Tests for the drift monitor's background alert writer
+"""
+import json
+
+from drift.monitor import DriftMonitor
+
+def test_alert_writer_runs_only_while_alerts_are_pending(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monitor = DriftMonitor()
+    assert monitor._alert_writer is None
+    
+    for i in range(100):
+        monitor._trigger_alert({'type': 'test', 'index': i})
+    writer = monitor._alert_writer
+    assert writer.is_alive()
+    
+    monitor.stop_monitoring()
+    
+    assert not writer.is_alive()
+    assert monitor._alert_writer is None
+    with open(monitor.alert_file) as f:
+        assert [json.loads(line)['index'] for line in f] == list(range(100))
+    
+    # A later alert starts a fresh writer
+    monitor._trigger_alert({'type': 'test', 'index': 100})
+    assert monitor._alert_writer.is_alive()
+    monitor.stop_monitoring()
+    with open(monitor.alert_file) as f:
+        assert sum(1 for _ in f) == 101
@@ -0,0 +1,55 @@
+"""
+Round trip from create_federated_clients to FederatedClient shard loading
+"""
+import json
+
+import numpy as np
+import pytest
+
+from data import preprocessing
+from federated.client import FederatedClient
+
+N_FEATURES = 4
+
+@pytest.fixture
+def processed_dir(tmp_path, monkeypatch):
+    """A data/processed tree with two category CSVs, as the working directory"""
+    monkeypatch.chdir(tmp_path)
+    directory = tmp_path / 'data' / 'processed'
+    directory.mkdir(parents=True)
+    
+    rng = np.random.default_rng(0)
+    rows = []
+    for category, n in [('athletic', 23), ('diver', 31)]:
+        features = rng.standard_normal((n, N_FEATURES)).round(4)
+        labels = rng.integers(0, 2, n)
+        lines = [','.join([f'f{j}' for j in range(N_FEATURES)] + ['target'])]
+        lines += [','.join([*map(str, x), str(y)]) for x, y in zip(features, labels)]
+        # A trailing blank line must not be counted as a row
+        (directory / f'{category}.csv').write_text('\n'.join(lines) + '\n\n')
+        rows.append(np.column_stack([features, labels]))
+    return directory, np.concatenate(rows)
+
+def test_client_shards_round_trip(processed_dir):
+    directory, rows = processed_dir
+    
+    preprocessing.create_federated_clients()
+    
+    with open(directory / 'clients.json') as f:
+        index = json.load(f)
+    assert len(index['clients']) == 5
+    
+    # Rows are shuffled by one seeded permutation and split contiguously
+    shuffled = rows[np.random.default_rng(42).permutation(len(rows))]
+    expected = np.array_split(shuffled, 5)
+    
+    for i, shard in enumerate(expected):
+        client = FederatedClient(str(i), data_dir=str(directory))
+        np.testing.assert_allclose(client.local_data['features'], shard[:, :N_FEATURES], rtol=1e-6)
+        np.testing.assert_array_equal(client.local_data['labels'], shard[:, N_FEATURES].astype(np.int8))
+
+def test_missing_client_has_no_data(processed_dir):
+    directory, _ = processed_dir
+    preprocessing.create_federated_clients()
+    
+    assert FederatedClient('5', data_dir=str(directory)).local_data is None
@@ -0,0 +1,63 @@
+"""
+Tests for the rule-based risk scores and batch input validation
+"""
+import itertools
+
+import numpy as np
+import pytest
+from flask import Flask
+
+from routes.predict import _score_features_nb, predict_bp, risk_scores
+
+# Values on, just below and just above every threshold the rules use
+GRID = {
+    0: [44, 45, 54.9, 55, 70],  # age
+    1: [0, 1],  # sex
+    2: [1, 2, 4],  # cp
+    3: [89.9, 90, 129.9, 130, 139.9, 140],  # trestbps
+    4: [199.9, 200, 239.9, 240],  # chol
+    5: [0, 1],  # fbs
+    7: [99.9, 100],  # thalach
+    8: [0, 1],  # exang
+    9: [0.9, 1, 1.9, 2],  # oldpeak
+    11: [0, 3],  # ca
+    12: [3, 6, 7],  # thal
+}
+
+def _rows():
+    base = np.array([50, 0, 2, 120, 180, 0, 0, 150, 0, 0.5, 1, 0, 3], dtype=np.float64)
+    for first, second in itertools.combinations(GRID, 2):
+        for a, b in itertools.product(GRID[first], GRID[second]):
+            row = base.copy()
+            row[first], row[second] = a, b
+            yield row
+    
+    rng = np.random.default_rng(0)
+    low = np.array([20, 0, 1, 80, 100, 0, 0, 60, 0, 0, 0, 0, 3])
+    high = np.array([100, 1, 4, 200, 600, 1, 2, 220, 1, 6.2, 2, 3, 7])
+    for row in rng.uniform(low, high, (2000, 13)):
+        # Round the categorical columns so the equality rules can fire
+        row[[1, 2, 5, 6, 8, 10, 11, 12]] = np.round(row[[1, 2, 5, 6, 8, 10, 11, 12]])
+        yield row
+
+def test_compiled_score_matches_vectorized():
+    rows = list(_rows())
+    expected = risk_scores(np.array(rows))
+    
+    for row, score in zip(rows, expected):
+        assert _score_features_nb(*row)[0] == score
+        assert risk_scores(row) == score
+
+@pytest.mark.parametrize('features', [
+    [[1.0] * 13, [1.0] * 12],  # ragged rows
+    [['abc'] * 13],
+    {'age': 50},
+    [1.0] * 13,  # a single vector, not a matrix
+])
+def test_batch_rejects_malformed_matrices(features):
+    app = Flask(__name__)
+    app.register_blueprint(predict_bp, url_prefix='/api/v1')
+    
+    response = app.test_client().post('/api/v1/predict/batch', json={'features': features})
+    assert response.status_code == 400
+    assert response.get_json()['message'].startswith('Expected an N x 13 feature matrix')
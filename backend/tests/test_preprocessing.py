@@ -0,0 +1,67 @@
+"""
+Tests for the setup script: model cache, sample models and label counts
+"""
+import os
+
+import numpy as np
+import pytest
+
+from data import preprocessing
+
+def _write_csv(path, target):
+    path.write_text('f0,f1,target\n' + ''.join(f'{i},{i * 2},{target}\n' for i in range(10)))
+
+def test_fingerprint_tracks_content_not_mtime(tmp_path):
+    source = tmp_path / 'athletic.csv'
+    _write_csv(source, 0)
+    stat = os.stat(source)
+    mask = np.zeros(10, dtype=bool)
+    model = preprocessing._make_model('athletic')
+    
+    before = preprocessing._training_fingerprint(model, [str(source)], mask)
+    _write_csv(source, 1)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    
+    assert preprocessing._training_fingerprint(model, [str(source)], mask) != before
+    mask[3] = True
+    assert preprocessing._training_fingerprint(model, [str(source)], mask) != before
+    assert preprocessing._training_fingerprint(
+        preprocessing._make_model('centralized'), [str(source)], np.zeros(10, dtype=bool)
+    ) != before
+
+def test_model_without_matching_fingerprint_is_stale(tmp_path):
+    model_path = str(tmp_path / 'model.pkl')
+    assert not preprocessing._is_up_to_date(model_path, 'abc')
+    
+    # A model with no sidecar, such as a sample model, is never reused
+    open(model_path, 'wb').close()
+    assert not preprocessing._is_up_to_date(model_path, 'abc')
+    
+    with open(model_path + preprocessing.MODEL_FINGERPRINT_SUFFIX, 'w') as f:
+        f.write('abc')
+    assert preprocessing._is_up_to_date(model_path, 'abc')
+    assert not preprocessing._is_up_to_date(model_path, 'abd')
+
+def test_sample_models_never_replace_existing_models(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    trained = preprocessing._model_path('centralized')
+    os.makedirs(os.path.dirname(trained))
+    with open(trained, 'wb') as f:
+        f.write(b'trained')
+    
+    preprocessing.create_sample_models_if_needed()
+    
+    with open(trained, 'rb') as f:
+        assert f.read() == b'trained'
+    assert os.path.exists(preprocessing._model_path('federated'))
+
+def test_label_stats_counts_past_int8_range():
+    y = np.ones(1000, dtype=np.int8)
+    y[:250] = 0
+    
+    # The uncompiled function is what runs when Numba is not installed
+    for label_stats in {preprocessing._label_stats,
+                        getattr(preprocessing._label_stats, 'py_func', preprocessing._label_stats)}:
+        pos, pos_rate = label_stats(y)
+        assert pos == 750
+        assert pos_rate == pytest.approx(75.0)
@@ -0,0 +1,77 @@
+"""
+Fast JSON encoding backed by orjson, with a stdlib fallback
+"""
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _numpy_default(obj):
+    """Let the stdlib fallback encode NumPy arrays and scalars like orjson does"""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class OrjsonCodec:
+    """
+    Drop-in for the ``json`` module as used by python-socketio/engineio
+
+    Socket.IO calls dumps/loads with stdlib keyword arguments such as
+    ``separators``; orjson always produces compact output, so they are
+    ignored when orjson is available.
+    """
+
+    @staticmethod
+    def dumps(obj, *args, **kwargs) -> str:
+        if orjson is None:
+            kwargs.setdefault('default', _numpy_default)
+            return json.dumps(obj, *args, **kwargs)
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+    @staticmethod
+    def loads(data, *args, **kwargs):
+        if orjson is None:
+            return json.loads(data, *args, **kwargs)
+        return orjson.loads(data)
+
+def dumps_bytes(obj) -> bytes:
+    """Serialize an object to UTF-8 encoded JSON bytes"""
+    if orjson is None:
+        return json.dumps(obj, default=_numpy_default).encode('utf-8')
+    return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes with orjson
+
+    Output matches the default provider: keys are sorted, and dates,
+    decimals and UUIDs go through the same default hook. jsonify()
+    responses are built straight from orjson's bytes.
+    """
+
+    def _option(self) -> int:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps(self, obj, **kwargs) -> str:
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._option()).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self._option())
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -9,6 +9,8 @@ import hashlib
 import json
 import os
 
+from flask import g
+
 def validate_patient_data(data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Validate patient data for prediction
@@ -365,4 +367,10 @@ def format_response(status: str, data: Any = None,
     if error:
         response['error'] = error
     
-    return response
\ No newline at end of file
+    return response
+
+def request_timestamp() -> str:
+    """ISO timestamp of the current request, formatted once and reused"""
+    if 'timestamp' not in g:
+        g.timestamp = datetime.now().isoformat()
+    return g.timestamp
\ No newline at end of file
@@ -4,7 +4,7 @@ Data scaling utilities for heart disease prediction
 import numpy as np
 import joblib
 import os
-from typing import List, Union, Optional
+from typing import Any, Dict, List, Union, Optional
 import json
 
 class DataScaler: